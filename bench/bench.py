@@ -0,0 +1,354 @@
+#! /usr/bin/env python
+
+"""Benchmark of vhdllint on synthetic designs.
+
+   Each case generates a design (whose size is proportional to the scale),
+   which is checked with the predefined rules of each family (file, lex,
+   syntax, sem and synth) and then with all of them.  Each run is done in
+   a new process, without the cache of results, and records the time, the
+   number of lines per second and the peak RSS.  For the run of all the
+   rules, the time spent by the executor in each phase (reading, parsing,
+   analysis, and the rules of each stage) is also recorded.
+
+   The results can be saved (--save) and compared to a saved baseline
+   (--baseline, by default baseline.json of this directory if it exists);
+   the exit status is 1 if a run is slower than the baseline by more than
+   the tolerance.  No baseline is provided, as the results depend on the
+   machine and on libghdl: it is created (with libghdl, on the machine
+   where the benchmark is run) with:
+
+     bench.py --save bench/baseline.json
+"""
+
+import importlib
+import inspect
+import json
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                '..'))
+
+import vhdllint.rulesexec as rulesexec
+from vhdllint.profiler import Profiler
+
+import libghdl.thin as thin
+
+# Default baseline.
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        'baseline.json')
+
+FAMILIES = ['filerules', 'lexrules', 'syntaxrules', 'semrules', 'synthrules']
+
+HEADER = """library ieee;
+use ieee.std_logic_1164.all;
+
+"""
+
+
+def gen_wide_entity(scale):
+    """An entity with thousands of ports."""
+    n = 1000 * scale
+    ports = ['    clk_i : in std_logic']
+    ports += ['    d{0}_i : in std_logic_vector(7 downto 0)'.format(i)
+              for i in range(n)]
+    ports += ['    q{0}_o : out std_logic_vector(7 downto 0)'.format(i)
+              for i in range(n)]
+    assigns = ['      q{0}_o <= d{0}_i;\n'.format(i) for i in range(n)]
+    return {'wide_entity.vhd': HEADER
+            + 'entity wide_entity is\n  port (\n'
+            + ';\n'.join(ports) + ');\nend wide_entity;\n\n'
+            + 'architecture arch of wide_entity is\nbegin\n'
+            + '  process (clk_i)\n  begin\n'
+            + '    if rising_edge(clk_i) then\n' + ''.join(assigns)
+            + '    end if;\n  end process;\nend arch;\n'}
+
+
+def gen_deep_generate(scale):
+    """Deeply nested if and for generate statements."""
+    depth = 50 * scale
+    res = [HEADER,
+           'entity deep_generate is\n',
+           '  port (\n    d_i : in std_logic;\n    q_o : out std_logic);\n',
+           'end deep_generate;\n\n',
+           'architecture arch of deep_generate is\nbegin\n']
+    for i in range(depth):
+        ind = '  ' * (i + 1)
+        if i % 2 == 0:
+            res.append('{0}g{1}: if true generate\n'.format(ind, i))
+        else:
+            res.append('{0}g{1}: for i{1} in 0 to 0 generate\n'.format(
+                ind, i))
+        res.append('{0}begin\n'.format(ind))
+    res.append('{0}q_o <= d_i;\n'.format('  ' * (depth + 1)))
+    for i in reversed(range(depth)):
+        res.append('{0}end generate g{1};\n'.format('  ' * (i + 1), i))
+    res.append('end arch;\n')
+    return {'deep_generate.vhd': ''.join(res)}
+
+
+def gen_large_package(scale):
+    """A package with many constants and functions."""
+    n = 2000 * scale
+    decls = []
+    bodies = []
+    for i in range(n):
+        decls.append('  constant c_{0} : natural := {0};\n'.format(i))
+        decls.append(
+            '  function f_{0} (a : natural) return natural;\n'.format(i))
+        bodies.append('  function f_{0} (a : natural) return natural is\n'
+                      '  begin\n'
+                      '    return a + c_{0};\n'
+                      '  end f_{0};\n\n'.format(i))
+    return {'large_pkg.vhd': 'package large_pkg is\n' + ''.join(decls)
+            + 'end large_pkg;\n\npackage body large_pkg is\n'
+            + ''.join(bodies) + 'end large_pkg;\n'}
+
+
+def gen_giant_case(scale):
+    """A process with a case statement of thousands of alternatives."""
+    n = 2000 * scale
+    alts = ['      when {0} =>\n        q_o <= {1};\n'.format(i, i % 7)
+            for i in range(n)]
+    return {'giant_case.vhd': HEADER
+            + 'entity giant_case is\n  port (\n'
+            + '    sel_i : in natural range 0 to {0};\n'.format(n)
+            + '    q_o : out natural);\nend giant_case;\n\n'
+            + 'architecture arch of giant_case is\nbegin\n'
+            + '  process (sel_i)\n  begin\n    case sel_i is\n'
+            + ''.join(alts)
+            + '      when others =>\n        q_o <= 0;\n'
+            + '    end case;\n  end process;\nend arch;\n'}
+
+
+def gen_hierarchy(scale):
+    """Many files, each entity instantiates the previous one."""
+    n = 200 * scale
+    res = {}
+    for i in range(n):
+        if i == 0:
+            body = '  q_o <= d_i;\n'
+        else:
+            body = ('  inst: entity work.level_{0}\n'
+                    '    port map (\n'
+                    '      d_i => d_i,\n'
+                    '      q_o => q_o);\n'.format(i - 1))
+        res['level_{0:05}.vhd'.format(i)] = (
+            HEADER + 'entity level_{0} is\n'
+            '  port (\n    d_i : in std_logic;\n    q_o : out std_logic);\n'
+            'end level_{0};\n\n'
+            'architecture arch of level_{0} is\nbegin\n'
+            '{1}end arch;\n'.format(i, body))
+    return res
+
+
+CASES = [('wide_entity', gen_wide_entity),
+         ('deep_generate', gen_deep_generate),
+         ('large_package', gen_large_package),
+         ('giant_case', gen_giant_case),
+         ('hierarchy', gen_hierarchy)]
+
+
+def get_rules(family):
+    """Return instances (with the default configuration) of the predefined
+       rules of family."""
+    res = []
+    dirname = os.path.join(os.path.dirname(rulesexec.__file__), family)
+    for filename in sorted(os.listdir(dirname)):
+        (root, ext) = os.path.splitext(filename)
+        if ext != '.py' or root.startswith('__'):
+            continue
+        name = 'vhdllint.' + family + '.' + root
+        module = importlib.import_module(name)
+        for e in dir(module):
+            el = getattr(module, e)
+            if inspect.isclass(el) and el.__module__ == name:
+                res.append(el())
+    return res
+
+
+def run_child(files, families, fd):
+    """Check files with the rules of families, write the results (in JSON)
+       on fd and exit."""
+    status = 0
+    try:
+        rules = rulesexec.RulesExec(quiet=True)
+        rules.set_cache(None)
+        for f in families:
+            for r in get_rules(f):
+                rules.add(r)
+        profiler = Profiler()
+        rules.set_profiler(profiler)
+        thin.analyze_init()
+        start = time.time()
+        rules.execute(files)
+        elapsed = time.time() - start
+        res = {'time': elapsed,
+               'errors': rules.get_nbr_errors(),
+               # In KiB on Linux.
+               'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               'phases': dict([(p, v[0])
+                               for p, v in profiler.phases.items()])}
+        with os.fdopen(fd, 'w') as f:
+            json.dump(res, f)
+    except BaseException:
+        import traceback
+        traceback.print_exc()
+        status = 1
+    finally:
+        os._exit(status)
+
+
+def run(files, families):
+    """Run the checks in a new process and return its results."""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    rfd, wfd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(rfd)
+        run_child(files, families, wfd)
+    os.close(wfd)
+    with os.fdopen(rfd, 'r') as f:
+        data = f.read()
+    _, st = os.waitpid(pid, 0)
+    if st != 0 or not data:
+        return None
+    return json.loads(data)
+
+
+def bench_case(name, gen, scale, repeat):
+    """Generate case name and check it with each family of rules.  Return
+       a dictionary of the results indexed by family."""
+    tmpdir = tempfile.mkdtemp(prefix='vhdllint-bench-')
+    try:
+        files = []
+        nbr_lines = 0
+        for filename, content in sorted(gen(scale).items()):
+            path = os.path.join(tmpdir, filename)
+            with open(path, 'w') as f:
+                f.write(content)
+            files.append(path)
+            nbr_lines += content.count('\n')
+        res = {}
+        for family in FAMILIES + ['all']:
+            families = FAMILIES if family == 'all' else [family]
+            best = None
+            for _ in range(repeat):
+                r = run(files, families)
+                if r is None:
+                    break
+                if best is None or r['time'] < best['time']:
+                    best = r
+            if best is None:
+                print('{0}/{1}: failed'.format(name, family))
+                continue
+            best['lines'] = nbr_lines
+            best['lines_per_sec'] = nbr_lines / max(best['time'], 1e-6)
+            res[family] = best
+            print('{0:<14} {1:<12} {2:>8} lines {3:>8.3f}s {4:>10.0f} l/s'
+                  ' {5:>8} KiB'.format(name, family, nbr_lines, best['time'],
+                                       best['lines_per_sec'], best['rss']))
+            if family == 'all':
+                for p in rulesexec.PHASES:
+                    if p in best['phases']:
+                        print('{0:<14}   {1:<10} {2:>24.3f}s'.format(
+                            '', p, best['phases'][p]))
+        return res
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def compare(results, baseline, tolerance):
+    """Compare results with baseline.  Return the number of runs slower than
+       the baseline by more than tolerance (in percent)."""
+    res = 0
+    for name, fams in sorted(results.items()):
+        for family, r in sorted(fams.items()):
+            b = baseline.get(name, {}).get(family)
+            if b is None:
+                continue
+            ratio = r['lines_per_sec'] / max(b['lines_per_sec'], 1e-6)
+            if ratio < 1 - tolerance / 100.0:
+                print('regression: {0}/{1}: {2:.0f} l/s instead of {3:.0f}'
+                      ' ({4:+.1f}%)'.format(name, family, r['lines_per_sec'],
+                                            b['lines_per_sec'],
+                                            (ratio - 1) * 100))
+                res += 1
+    return res
+
+
+def usage():
+    print('usage: {0} [OPTIONS]'.format(sys.argv[0]))
+    print('Options are:')
+    print(' --scale N        size of the designs (default: 1)')
+    print(' --repeat N       runs of each case, the best is kept (default: 3)')
+    print(' --case NAME      run only this case (can be repeated)')
+    print(' --save FILE      save the results to FILE')
+    print(' --baseline FILE  compare with the results saved in FILE')
+    print('                  (default: {0} if it exists)'.format(BASELINE))
+    print(' --tolerance PCT  allowed slowdown (default: 10)')
+    print('Cases are: ' + ', '.join([n for n, _ in CASES]))
+
+
+def main():
+    scale = 1
+    repeat = 3
+    cases = []
+    save = None
+    baseline = BASELINE if os.path.exists(BASELINE) else None
+    tolerance = 10.0
+    args = sys.argv[1:]
+    while args:
+        arg = args.pop(0)
+        if arg in ['-h', '--help']:
+            usage()
+            sys.exit(0)
+        if not args:
+            print('missing value for option {0}'.format(arg))
+            sys.exit(2)
+        val = args.pop(0)
+        if arg == '--scale':
+            scale = int(val)
+        elif arg == '--repeat':
+            repeat = int(val)
+        elif arg == '--case':
+            if val not in [n for n, _ in CASES]:
+                print("unknown case '{0}'".format(val))
+                sys.exit(2)
+            cases.append(val)
+        elif arg == '--save':
+            save = val
+        elif arg == '--baseline':
+            baseline = val
+        elif arg == '--tolerance':
+            tolerance = float(val)
+        else:
+            print('unknown option {0}'.format(arg))
+            sys.exit(2)
+
+    results = {}
+    for name, gen in CASES:
+        if not cases or name in cases:
+            results[name] = bench_case(name, gen, scale, repeat)
+
+    if save is not None:
+        with open(save, 'w') as f:
+            json.dump({'scale': scale, 'cases': results}, f, indent=1,
+                      sort_keys=True)
+    if baseline is not None:
+        with open(baseline) as f:
+            base = json.load(f)
+        if base['scale'] != scale:
+            print('baseline was done with scale {0}, not compared'.format(
+                base['scale']))
+        elif compare(results, base['cases'], tolerance) != 0:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -6,10 +6,12 @@ try:
     import os
     exe = {'nt': '.exe'}.get(os.name, '')
     kwargs = {'executables': [Executable('vhdllint-ohwr',
-                                         targetName='vhdllint-ohwr' + exe)]}
+                                         targetName='vhdllint-ohwr' + exe),
+                              Executable('vhdllint-client',
+                                         targetName='vhdllint-client' + exe)]}
 except ImportError:
     from setuptools import setup
-    kwargs = {'scripts': ['vhdllint-ohwr']}
+    kwargs = {'scripts': ['vhdllint-ohwr', 'vhdllint-client']}
 
 setup(
     name='vhdllint',
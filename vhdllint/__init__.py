@@ -1 +1,3 @@
 # Package.
+
+__version__ = '0.1.0'
@@ -0,0 +1,219 @@
+"""Python mirror of the constructs of the design units of a file.
+
+   The constructs (as walked by syntaxrules.SyntaxWalker) of the kinds
+   asked for by the rules (see SemRule.mirror_kinds), and the design units,
+   are recorded once, in preorder, in typed arrays: kind, parent, location,
+   identifier, nesting level and end of the subtree.  The parent of a
+   construct is the closest mirrored construct which encloses it.  The
+   accessors are indexed by node and are array lookups instead of calls to
+   libghdl, so rules that look at the same nodes several times (or only at
+   some kinds of nodes) should use the mirror (RuleInput.mirror) instead of
+   walking the tree.
+
+   A design unit is mirrored when it is first used (given to an accessor),
+   so after it has been analyzed by the semantic or synthesis stage."""
+
+import os.path
+from array import array
+import libghdl.iirs as iirs
+import libghdl.thin as thin
+import libghdl.nodes_meta as nodes_meta
+import libghdl.thinutils as thinutils
+from vhdllint.syntaxrules import SyntaxWalker
+from vhdllint.utils import Location
+
+_has_identifier = getattr(nodes_meta, 'Has_Identifier', None)
+
+
+class AstMirror(object):
+    def __init__(self, kinds):
+        """Mirror the constructs whose kind is in kinds (and the design
+           units)."""
+        self._kinds = frozenset(list(kinds) + [iirs.Iir_Kind.Design_Unit])
+        # Arrays indexed by slot (the position of the node in preorder).
+        self.nodes = array('i')
+        self.kinds = array('H')
+        self.parents = array('i')   # Slot of the parent, -1 for the root
+        self.locations = array('I')
+        self.identifiers = array('I')
+        self.levels = array('H')    # See SyntaxContext.level
+        self.ends = array('I')      # Slot after the last node of the subtree
+        # Slot of the mirrored nodes, indexed by node.
+        self._slots = {}
+        self._stack = []
+        self._identifier_kinds = {}
+
+    def add_unit(self, unit):
+        """Mirror the constructs of unit (a design unit), if not already
+           done."""
+        if unit in self._slots:
+            return
+        start = len(self.nodes)
+        _MirrorWalker(self).walk(None, unit)
+        nodes = self.nodes
+        for slot in range(start, len(nodes)):
+            self._slots[nodes[slot]] = slot
+
+    def _has_identifier(self, k):
+        res = self._identifier_kinds.get(k)
+        if res is None:
+            res = _has_identifier is not None and bool(_has_identifier(k))
+            self._identifier_kinds[k] = res
+        return res
+
+    def _open(self, n, k, level):
+        slot = len(self.nodes)
+        self.nodes.append(n)
+        self.kinds.append(k)
+        self.parents.append(self._stack[-1] if self._stack else -1)
+        self.locations.append(iirs.Get_Location(n))
+        self.identifiers.append(
+            iirs.Get_Identifier(n) if self._has_identifier(k) else 0)
+        self.levels.append(level)
+        self.ends.append(0)
+        self._stack.append(slot)
+
+    def _close(self):
+        self.ends[self._stack.pop()] = len(self.nodes)
+
+    def get_slot(self, n):
+        """Return the slot of node n, or -1 if n is not mirrored."""
+        return self._slots.get(n, -1)
+
+    def _slot(self, n):
+        slot = self._slots.get(n)
+        if slot is None:
+            if iirs.Get_Kind(n) != iirs.Iir_Kind.Design_Unit:
+                raise KeyError('node {0} is not mirrored'.format(n))
+            self.add_unit(n)
+            slot = self._slots[n]
+        return slot
+
+    def __contains__(self, n):
+        return self.get_slot(n) >= 0
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def get_kind(self, n):
+        return self.kinds[self._slot(n)]
+
+    def get_location(self, n):
+        return self.locations[self._slot(n)]
+
+    def get_identifier(self, n):
+        """Return the identifier (or label) of n, 0 if none."""
+        return self.identifiers[self._slot(n)]
+
+    def get_level(self, n):
+        return self.levels[self._slot(n)]
+
+    def get_parent(self, n):
+        """Return the construct which encloses n (Null_Iir for a design
+           unit)."""
+        p = self.parents[self._slot(n)]
+        return thin.Null_Iir if p < 0 else self.nodes[p]
+
+    def get_first_child(self, n):
+        slot = self._slot(n)
+        if slot + 1 < self.ends[slot]:
+            return self.nodes[slot + 1]
+        return thin.Null_Iir
+
+    def get_next_sibling(self, n):
+        slot = self._slot(n)
+        p = self.parents[slot]
+        nxt = self.ends[slot]
+        if p >= 0 and nxt < self.ends[p]:
+            return self.nodes[nxt]
+        return thin.Null_Iir
+
+    def children(self, n):
+        """Iterate on the constructs directly within n."""
+        slot = self._slot(n)
+        end = self.ends[slot]
+        slot += 1
+        while slot < end:
+            yield self.nodes[slot]
+            slot = self.ends[slot]
+
+    def nodes_of_kind(self, kinds, root=None):
+        """Return the list of the constructs (within root, including it, or
+           within the mirrored units if root is None) whose kind is in
+           kinds, in preorder.  The kinds must be mirrored."""
+        missing = [k for k in kinds if k not in self._kinds]
+        if missing:
+            raise ValueError('kinds {0} are not mirrored'.format(missing))
+        if root is None:
+            start, end = 0, len(self.nodes)
+        else:
+            start = self._slot(root)
+            end = self.ends[start]
+        nodes = self.nodes
+        kinds_arr = self.kinds
+        return [nodes[s] for s in range(start, end) if kinds_arr[s] in kinds]
+
+
+class _MirrorWalker(SyntaxWalker):
+    """Walker which records the constructs of the kinds of a mirror."""
+
+    def __init__(self, mirror):
+        super(_MirrorWalker, self).__init__([])
+        self._mirror = mirror
+
+    def _node(self, n, ctxt):
+        k = iirs.Get_Kind(n)
+        if k not in self._mirror._kinds:
+            super(_MirrorWalker, self)._node(n, ctxt)
+            return
+        self._mirror._open(n, k, ctxt.level)
+        super(_MirrorWalker, self)._node(n, ctxt)
+        self._mirror._close()
+
+
+def test(runner):
+    """Testsuite of the mirror (runner is the executor of the testsuite)."""
+    from vhdllint.rulesexec import RulesExec, test_failed
+    from vhdllint.semrules import SemRule
+    kinds = [iirs.Iir_Kind.Component_Instantiation_Statement] \
+        + list(iirs.Iir_Kinds.Process_Statement)
+
+    class CheckMirror(SemRule):
+        """Compare nodes_of_kind with a walk of the units."""
+
+        rulename = 'Mirror'
+        mirror_kinds = kinds
+
+        def __init__(self):
+            super(CheckMirror, self).__init__(None)
+            self.nbr_nodes = 0
+
+        def check(self, input, unit):
+            mirror = input.mirror
+            for ks in [kinds] + [[k] for k in kinds]:
+                walked = [n for n in thinutils.nodes_iter(unit)
+                          if iirs.Get_Kind(n) in ks]
+                mirrored = mirror.nodes_of_kind(ks, unit)
+                if sorted(mirrored) != sorted(walked):
+                    self.error(Location.from_node(unit),
+                               'nodes_of_kind: {0} instead of {1}'.format(
+                                   mirrored, walked))
+            self.nbr_nodes += len(mirror.nodes_of_kind(kinds, unit))
+            try:
+                mirror.nodes_of_kind([iirs.Iir_Kind.If_Statement])
+                self.error(Location.from_node(unit), 'kind not mirrored')
+            except ValueError:
+                pass
+
+    print('  test: nodes_of_kind')
+    rule = CheckMirror()
+    exe = RulesExec(quiet=True)
+    exe.add(rule)
+    messages = []
+    exe.set_output(messages.append)
+    exe.reset_work_library()
+    exe.execute([os.path.join(os.path.dirname(__file__), 'testfiles',
+                              'mirror1.vhdl')])
+    if messages or rule.nbr_nodes != 4:
+        test_failed(runner, 'astmirror', '{0} nodes: {1}'.format(
+            rule.nbr_nodes, messages))
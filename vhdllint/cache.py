@@ -0,0 +1,206 @@
+"""On-disk cache of rule results.
+
+   The results of the file and lexical rules only depend on the content of
+   the file, on the rules (and their configuration) and on the version of
+   vhdllint.  They are saved in a directory (one file per entry) and
+   replayed when nothing has changed.  The least recently used entries are
+   removed when the size of the directory exceeds a limit.  The size is
+   estimated, so that the directory is only listed when needed."""
+
+import hashlib
+import json
+import os
+import types
+import vhdllint
+
+
+# Default maximum size of the cache directory.
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+
+# File of the cache directory with the estimated size of the entries.
+SIZE_FILE = 'size.json'
+
+# Number of trims after which the size is computed again (the estimate
+# drifts when several processes use the cache).
+RESCAN_PERIOD = 100
+
+
+def default_cache_dir():
+    """Return the default directory of the cache."""
+    base = os.environ.get('XDG_CACHE_HOME')
+    if not base:
+        base = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'vhdllint')
+
+
+def config_repr(v, _funcs=None):
+    """Return a string for v which doesn't depend on the process (so
+       functions are represented by their code, default values and
+       captured values, and not by their address)."""
+    if isinstance(v, (list, tuple)):
+        return '[' + ','.join([config_repr(e, _funcs) for e in v]) + ']'
+    elif isinstance(v, (set, frozenset)):
+        return '{' + ','.join(sorted([config_repr(e, _funcs)
+                                      for e in v])) + '}'
+    elif isinstance(v, dict):
+        return '{' + ','.join(sorted(
+            [config_repr(k, _funcs) + ':' + config_repr(e, _funcs)
+             for k, e in v.items()])) + '}'
+    elif isinstance(v, types.CodeType):
+        return 'code(' + ','.join([repr(v.co_code),
+                                   config_repr(v.co_consts, _funcs),
+                                   repr(v.co_names)]) + ')'
+    elif hasattr(v, '__code__'):
+        # The functions being represented (a closure may capture itself).
+        funcs = _funcs or []
+        if any(f is v for f in funcs):
+            return 'recursive'
+        funcs = funcs + [v]
+        cells = []
+        for c in getattr(v, '__closure__', None) or ():
+            try:
+                cells.append(config_repr(c.cell_contents, funcs))
+            except ValueError:
+                # Empty cell.
+                cells.append('empty')
+        return 'func(' + ','.join([
+            config_repr(v.__code__, funcs),
+            config_repr(getattr(v, '__defaults__', None), funcs),
+            '[' + ','.join(cells) + ']']) + ')'
+    else:
+        return repr(v)
+
+
+def rule_key(rule):
+    """Return a string that identifies rule: its class and its
+       configuration (see Rule.config)."""
+    cls = rule.__class__
+    return '{0}.{1}{2}'.format(cls.__module__, cls.__name__, rule.config())
+
+
+class ResultCache(object):
+    def __init__(self, directory, max_size=DEFAULT_MAX_SIZE):
+        self._dir = directory
+        self._max_size = max_size
+        self._added = 0             # Size of the entries written
+
+    def get_directory(self):
+        return self._dir
+
+    def key(self, *parts):
+        """Return the key for parts (strings or buffers)."""
+        h = hashlib.sha1()
+        h.update(vhdllint.__version__.encode('utf-8'))
+        for p in parts:
+            if not isinstance(p, (bytes, bytearray, memoryview)):
+                p = config_repr(p).encode('utf-8')
+            h.update(str(len(p)).encode('utf-8') + b':')
+            h.update(p)
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self._dir, key[:2], key[2:])
+
+    def get(self, key):
+        """Return the value for key, or None if not in the cache."""
+        path = self._path(key)
+        try:
+            with open(path, 'r') as f:
+                res = json.load(f)
+            # Mark as recently used.
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            return None
+        return res
+
+    def put(self, key, value):
+        """Save value (which must be serializable in json) for key.
+           Errors are silently ignored, the cache is only an optimization."""
+        path = self._path(key)
+        tmp = '{0}.{1}'.format(path, os.getpid())
+        try:
+            d = os.path.dirname(path)
+            if not os.path.isdir(d):
+                os.makedirs(d)
+            with open(tmp, 'w') as f:
+                json.dump(value, f, separators=(',', ':'))
+                self._added += f.tell()
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            pass
+
+    def get_added(self):
+        """Return the size of the entries written by this process since the
+           last trim."""
+        return self._added
+
+    def add_size(self, size):
+        """Account for size bytes of entries written by another process
+           (like a worker of RulesExec.execute_jobs)."""
+        self._added += size
+
+    def _read_size(self):
+        try:
+            with open(os.path.join(self._dir, SIZE_FILE)) as f:
+                data = json.load(f)
+            return data['size'], data['trims']
+        except (IOError, OSError, ValueError, KeyError, TypeError):
+            return None, 0
+
+    def _write_size(self, size, trims):
+        path = os.path.join(self._dir, SIZE_FILE)
+        tmp = '{0}.{1}'.format(path, os.getpid())
+        try:
+            with open(tmp, 'w') as f:
+                json.dump({'size': size, 'trims': trims}, f)
+            os.rename(tmp, path)
+        except (IOError, OSError):
+            pass
+
+    def trim(self):
+        """Remove the least recently used entries until the size of the
+           cache is below the limit.  The entries are only listed when the
+           estimated size (the size when they were last listed plus the size
+           of the entries written since) exceeds the limit, or periodically
+           to correct the estimate."""
+        size, trims = self._read_size()
+        added = self._added
+        self._added = 0
+        if size is not None and trims < RESCAN_PERIOD \
+           and size + added <= self._max_size:
+            if added:
+                self._write_size(size + added, trims + 1)
+            return
+        self._write_size(self._remove_old_entries(), 0)
+
+    def _remove_old_entries(self):
+        """List the entries and remove the least recently used ones until
+           the size of the cache is below the limit.  Return the size of the
+           remaining entries."""
+        entries = []
+        total = 0
+        try:
+            for sub in os.listdir(self._dir):
+                d = os.path.join(self._dir, sub)
+                # Only the entries (not the libraries of importcache).
+                if len(sub) != 2 or not os.path.isdir(d):
+                    continue
+                for name in os.listdir(d):
+                    path = os.path.join(d, name)
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+                    total += st.st_size
+        except OSError:
+            return total
+        if total <= self._max_size:
+            return total
+        entries.sort()
+        for mtime, size, path in entries:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+            if total <= self._max_size:
+                break
+        return total
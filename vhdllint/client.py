@@ -0,0 +1,96 @@
+"""Client of the lint daemon (see server.py).
+
+   This module doesn't import libghdl nor the rules, so that it starts
+   quickly."""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+
+
+def default_socket_path():
+    """Return the default path of the socket of the daemon."""
+    base = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(base, 'vhdllint-{0}.sock'.format(os.getuid()))
+
+
+def request(path, req):
+    """Send request req to the daemon on socket path.  Yield the answers."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+        sock.sendall(json.dumps(req).encode('utf-8') + b'\n')
+        f = sock.makefile('rb')
+        for line in f:
+            yield json.loads(line.decode('utf-8'))
+        f.close()
+    finally:
+        sock.close()
+
+
+def usage():
+    print('usage: {0} [OPTIONS] files...'.format(sys.argv[0]))
+    print('Check files using the daemon started with --server')
+    print('Options are:')
+    print(' --socket=PATH  socket of the daemon')
+    print(' --shutdown     stop the daemon')
+
+
+def main(argv):
+    path = default_socket_path()
+    shutdown = False
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg in ['-h', '--help']:
+            usage()
+            sys.exit(0)
+        elif arg.startswith('--socket='):
+            path = arg[9:]
+        elif arg == '--shutdown':
+            shutdown = True
+        elif arg[0] != '-' or arg in ['--import', '--synth', '--tb', '--top']:
+            break
+        else:
+            print('unknown option {0}'.format(arg))
+            print('try: {0} --help'.format(argv[0]))
+            sys.exit(2)
+        i += 1
+
+    if shutdown:
+        req = {'shutdown': True}
+    elif i == len(argv):
+        print('no input file')
+        sys.exit(2)
+    else:
+        req = {'args': argv[i:], 'cwd': os.getcwd()}
+
+    status = 2
+    try:
+        for ans in request(path, req):
+            if 'diagnostic' in ans:
+                sys.stderr.write(ans['diagnostic'])
+            elif 'messages' in ans:
+                sys.stderr.write(ans['messages'])
+            elif 'status' in ans:
+                status = ans['status']
+                if status > 1:
+                    sys.stderr.write('error in the daemon (see its output)\n')
+                    break
+                nbr_files = ans['files']
+                print('{0} file{1} checked'.format(
+                    nbr_files, '' if nbr_files < 2 else 's'))
+                nbr_errors = ans['errors']
+                if nbr_errors == 0:
+                    print('No error')
+                else:
+                    print('{0} error(s)'.format(nbr_errors))
+            else:
+                status = 0
+    except socket.error as e:
+        sys.stderr.write('cannot connect to the daemon on {0}: {1}\n'.format(
+            path, e))
+        sys.exit(2)
+    sys.exit(status)
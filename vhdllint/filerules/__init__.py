@@ -14,5 +14,8 @@ class FileRule(Rule):
 
     def check(self, loc, lines):
         """The check to be performed on the whole file.
-            lines is the list of lines, with the line terminator"""
+            lines is the sequence of lines (a utils.FileLines), with the
+            line terminator.  Prefer the facts of lines (like offsets,
+            ends, eols, trailing or tabs), which are computed by a single
+            scan of the buffer for all the rules, to a loop on the lines"""
         assert False  # Must be redefined
@@ -11,13 +11,11 @@ class CheckCharSet(FileRule):
         super(self.__class__, self).__init__(name)
 
     def check(self, loc, lines):
-        for lineno, line in enumerate(lines):
-            for col, c in enumerate(line):
-                if ord(c) > 127:
-                    self.error(loc.new(lineno + 1, col + 1),
-                               "Non 7-bit ASCII character")
-                    # At most one error per line
-                    break
+        # At most one error per line
+        for lineno, pos in lines.non_ascii:
+            self.error(loc.new(lineno + 1,
+                               pos - lines.offsets[lineno] + 1),
+                       "Non 7-bit ASCII character")
 
     @staticmethod
     def test(runner):
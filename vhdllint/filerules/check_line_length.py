@@ -11,15 +11,13 @@ class CheckLineLength(FileRule):
         self._maxlen = maxlen
 
     def check(self, loc, lines):
-        lineno = 1
-        for line in lines:
-            linelen = len(line)
-            # Strip CR/LF
-            while linelen > 1 and line[linelen - 1] in b"\r\n":
-                linelen -= 1
-            if linelen > self._maxlen:
-                self.error(loc.new(lineno, linelen), 'line is too long')
-            lineno += 1
+        offsets = lines.offsets
+        ends = lines.ends
+        maxlen = self._maxlen
+        for lineno in range(len(lines)):
+            linelen = ends[lineno] - offsets[lineno]
+            if linelen > maxlen:
+                self.error(loc.new(lineno + 1, linelen), 'line is too long')
 
     @staticmethod
     def test(runner):
@@ -14,10 +14,10 @@ class CheckMissingNewline(FileRule):
         nbr_lines = len(lines)
         if nbr_lines == 0:
             return
-        lastline = lines[nbr_lines - 1]
-        linelen = len(lastline)
-        if linelen == 0 or lastline[linelen - 1] not in b"\r\n":
-            self.error(loc.new(nbr_lines, linelen),
+        end = lines.offsets[nbr_lines]
+        if lines.ends[nbr_lines - 1] == end:
+            self.error(loc.new(nbr_lines,
+                               end - lines.offsets[nbr_lines - 1]),
                        'missing newline at end of file')
 
     @staticmethod
@@ -12,15 +12,17 @@ class CheckNewline(FileRule):
         self._newline = newline
 
     def check(self, loc, lines):
-        nllen = len(self._newline)
-        for lineno, line in enumerate(lines):
-            l = len(line)
-            if l < nllen \
-               or line[-nllen:] != self._newline \
-               or (l > nllen and line[-nllen - 1] in b"\r\n"):
-                self.error(loc.new(lineno + 1, l), "incorrect newline")
-            elif l > nllen > l and line[0] in b"\r\n":
-                self.error(loc.new(lineno + 1, 1), "incorrect newline")
+        offsets = lines.offsets
+        # The lines whose terminator is not the expected one (including
+        # the last line, if it has no terminator).
+        bad = []
+        for eol, linenos in lines.eols.items():
+            if eol != self._newline:
+                bad.extend(linenos)
+        for lineno in sorted(bad):
+            self.error(loc.new(lineno + 1,
+                               offsets[lineno + 1] - offsets[lineno]),
+                       "incorrect newline")
 
     @staticmethod
     def test(runner):
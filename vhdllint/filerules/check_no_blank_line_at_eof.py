@@ -14,8 +14,8 @@ class CheckNoBlankLineAtEOF(FileRule):
         nbr_lines = len(lines)
         if nbr_lines == 0:
             return
-        lastline = lines[nbr_lines - 1]
-        if lastline.rstrip(b"\r\n\t ") == b'':
+        blanks = lines.blanks
+        if blanks and blanks[-1] == nbr_lines - 1:
             self.error(loc.new(nbr_lines, 1),
                        'blank line at end of file')
 
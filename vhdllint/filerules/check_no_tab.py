@@ -1,5 +1,7 @@
 from vhdllint.filerules import FileRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
+from vhdllint.utils import TABS
+import re
 
 
 class CheckNoTAB(FileRule):
@@ -10,16 +12,29 @@ class CheckNoTAB(FileRule):
     def __init__(self, tabs=b"\t\v\f", name=None):
         super(self.__class__, self).__init__(name)
         self._tabs = tabs
+        self._chars = [tabs[i:i + 1] for i in range(len(tabs))]
+        self._tabs_re = None
+        if any(c not in TABS for c in self._chars):
+            # Not recorded by FileLines.
+            self._tabs_re = re.compile(b'[' + re.escape(tabs) + b']')
 
     def check(self, loc, lines):
-        for lineno, line in enumerate(lines):
-            for col, c in enumerate(line):
-                if c in self._tabs:
-                    self.error(loc.new(lineno + 1, col + 1),
-                               "HT not allowed" if c == '\t'
-                               else "character not allowed")
-                    # At most one error per line
-                    break
+        # At most one error per line: the first character of each line.
+        if self._tabs_re is None:
+            firsts = {}
+            for c in self._chars:
+                for lineno, pos in lines.tabs[c]:
+                    if firsts.get(lineno, pos) >= pos:
+                        firsts[lineno] = pos
+            firsts = sorted(firsts.items())
+        else:
+            firsts = [(lineno, m.start())
+                      for lineno, m in lines.first_matches(self._tabs_re)]
+        for lineno, pos in firsts:
+            c = bytes(lines.buffer[pos:pos + 1])
+            self.error(loc.new(lineno + 1, pos - lines.offsets[lineno] + 1),
+                       "HT not allowed" if c == '\t'
+                       else "character not allowed")
 
     @staticmethod
     def test(runner):
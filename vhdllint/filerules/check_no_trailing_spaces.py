@@ -11,11 +11,10 @@ class CheckNoTrailingSpaces(FileRule):
         super(self.__class__, self).__init__(name)
 
     def check(self, loc, lines):
-        for lineno, line in enumerate(lines):
-            line = line.rstrip(b"\r\n")
-            ln = len(line)
-            if ln > 0 and line[ln - 1] in b' \t':
-                self.error(loc.new(lineno + 1, ln), "trailing space")
+        for lineno in lines.trailing:
+            self.error(loc.new(lineno + 1,
+                               lines.ends[lineno] - lines.offsets[lineno]),
+                       "trailing space")
 
     @staticmethod
     def test(runner):
@@ -0,0 +1,115 @@
+"""Cache of the --import files in a libghdl library.
+
+   The units of the --import files are saved in the work library file of a
+   directory of the cache (like 'ghdl -i' does), with a manifest of the
+   hash of each file.  When this library is loaded, the units of the
+   unchanged files are known without parsing the files: libghdl parses and
+   analyzes a unit only if it is referenced.  The units of the files that
+   have changed (or are not imported anymore) are removed from the library,
+   and the changed files are parsed and saved again.
+
+   This needs a libghdl which exports libraries.save_work_library and
+   libraries.load_design_unit, and must be set up before libghdl is
+   initialized."""
+
+import hashlib
+import json
+import os
+import libghdl.iirs as iirs
+import libghdl.thin as thin
+import libghdl.thinutils as thinutils
+import vhdllint.nodeutils as nodeutils
+
+MANIFEST = 'manifest.json'
+
+
+def _save_work_library():
+    return getattr(getattr(thin, 'libghdl', None),
+                   'libraries__save_work_library', None)
+
+
+def _load_design_unit():
+    return getattr(getattr(thin, 'libghdl', None),
+                   'libraries__load_design_unit', None)
+
+
+def is_supported():
+    return _save_work_library() is not None \
+        and _load_design_unit() is not None
+
+
+def load_unit(unit):
+    """Parse unit, a unit of the library which has not been loaded (in the
+       Disk state), so that it can be analyzed."""
+    _load_design_unit()(unit, unit)
+
+
+def _file_hash(filename):
+    h = hashlib.sha1()
+    try:
+        with open(filename, 'rb') as f:
+            h.update(f.read())
+    except (IOError, OSError):
+        return None
+    return h.hexdigest()
+
+
+class ImportCache(object):
+    def __init__(self, directory):
+        self._dir = directory
+        self._hashes = {}           # Hash of the imported files
+        self._fresh = set()         # Files whose units are in the library
+
+    def setup(self, filenames):
+        """Use the library for the imported files filenames.  Must be called
+           before the initialization of libghdl.  Return the set of files
+           which don't need to be read."""
+        try:
+            if not os.path.isdir(self._dir):
+                os.makedirs(self._dir)
+            with open(os.path.join(self._dir, MANIFEST)) as f:
+                manifest = json.load(f)
+        except (IOError, OSError, ValueError):
+            manifest = {}
+        self._hashes = dict([(f, _file_hash(f)) for f in filenames])
+        self._fresh = set([f for f in filenames
+                           if self._hashes[f] is not None
+                           and manifest.get(f) == self._hashes[f]])
+        thin.set_option('--workdir=' + os.path.join(self._dir, ''))
+        return self._fresh
+
+    def get_hash(self, filename):
+        """Return the hash of imported file filename."""
+        return self._hashes.get(filename)
+
+    def purge_stale(self):
+        """Remove from the work library (once loaded) the units of the files
+           that have changed or are not imported anymore.  Return True if
+           some were removed."""
+        stale = []
+        work = thin.Work_Library.value
+        for f in thinutils.chain_iter(iirs.Get_Design_File_Chain(work)):
+            name = thin.Get_Name_Ptr(iirs.Get_Design_File_Filename(f))
+            if not isinstance(name, str):
+                name = name.decode('utf-8')
+            if name not in self._fresh:
+                stale.append(f)
+        for f in stale:
+            thin.Purge_Design_File(f)
+        if stale:
+            nodeutils.clear_identifier_cache()
+        return len(stale) != 0
+
+    def save(self):
+        """Save the work library (which must only contain the units of the
+           imported files) and the manifest."""
+        _save_work_library()()
+        manifest = dict([(f, h) for f, h in self._hashes.items()
+                         if h is not None])
+        tmp = os.path.join(self._dir, MANIFEST + '.tmp')
+        try:
+            with open(tmp, 'w') as f:
+                json.dump(manifest, f)
+            os.rename(tmp, os.path.join(self._dir, MANIFEST))
+        except (IOError, OSError):
+            pass
@@ -4,15 +4,43 @@
 
    Lexical rules include case of keywords, specific rules about comments,
    spaces around operators...
+
+   A LexStreamRule is instead called once per file with all the tokens, as
+   parallel arrays, so that it can select the tokens it handles without a
+   call per token.
    """
 
 from vhdllint.rule import Rule
 
 
 class LexRule(Rule):
+    # Tokens (libghdl.tokens.Tok) handled by the rule, or None for all the
+    # tokens.  Any container can be used, like a range for consecutive
+    # tokens.  The check method is only called for these tokens.
+    toks = None
+
     def __init__(self, rulename):
         super(LexRule, self).__init__(rulename)
 
     def check(self, loc, filebuf, tok):
-        """The check to be performed on a token."""
+        """The check to be performed on a token.
+            filebuf is the content of the file, as a memoryview (not a
+            copy): an element is an integer, use bytes() to copy a slice."""
+        assert False  # Must be redefined
+
+
+class LexStreamRule(LexRule):
+    # The check method is not called for each token.
+    toks = ()
+
+    def __init__(self, rulename):
+        super(LexStreamRule, self).__init__(rulename)
+
+    def check(self, loc, filebuf, stream):
+        """The check to be performed on the tokens of a file.
+            loc is the location of the file, filebuf its content (like for
+            LexRule) and stream its tokens (a tokstream.TokenStream): the
+            parallel arrays kinds, starts and ends.  The line and column of
+            a token are computed only when needed, from the LineTable of
+            the stream (see get_line and get_location)."""
         assert False  # Must be redefined
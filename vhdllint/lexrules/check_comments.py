@@ -7,6 +7,7 @@ class CheckComments(LexRule):
     """Check comments are followed by a space or are line comment."""
 
     rulename = 'Comments'
+    toks = [tokens.Tok.Comment]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -1,13 +1,13 @@
 from vhdllint.lexrules import LexRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 import libghdl.tokens as tokens
-import libghdl.thin as thin
 
 
 class CheckForbiddenId(LexRule):
     """Check for fobidden identifiers."""
 
     rulename = 'ForbiddenId'
+    toks = [tokens.Tok.Identifier]
 
     def __init__(self, ids=[b'l', b'o'], name=None):
         super(self.__class__, self).__init__(name)
@@ -15,7 +15,9 @@ class CheckForbiddenId(LexRule):
 
     def check(self, loc, filebuf, tok):
         if tok == tokens.Tok.Identifier:
-            s = thin.Get_Name_Ptr(thin.Scanner.Current_Identifier())
+            # Identifiers are case insensitive (the tokens are replayed, so
+            # the scanner cannot be used).
+            s = bytes(filebuf[loc.start:loc.end]).lower()
             if s in self._ids:
                 self.error(
                     loc, "use of forbidden identifier '{0}'".format(
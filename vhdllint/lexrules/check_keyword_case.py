@@ -8,6 +8,7 @@ class CheckKeywordCase(LexRule):
     # OK, in VHDL there are no keywords but reserved words.
 
     rulename = 'KeywordCase'
+    toks = range(tokens.Tok.And, tokens.Tok.Tolerance + 1)
 
     def __init__(self, filter=lambda x: x.islower(), name=None):
         super(self.__class__, self).__init__(name)
@@ -15,7 +16,7 @@ class CheckKeywordCase(LexRule):
 
     def check(self, loc, filebuf, tok):
         if tok >= tokens.Tok.And and tok <= tokens.Tok.Tolerance:
-            s = filebuf[loc.start:loc.end]
+            s = bytes(filebuf[loc.start:loc.end])
             if not self._filter(s):
                 self.error(loc, "incorrect keyword case for {0}".format(s))
 
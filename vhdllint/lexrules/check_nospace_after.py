@@ -11,6 +11,7 @@ class CheckNoSpaceAfter(LexRule):
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
         self._toks = [tokens.Tok.Tick, tokens.Tok.Dot]
+        self.toks = self._toks
         self._spaces = b" \t"
 
     def check(self, loc, filebuf, tok):
@@ -19,7 +20,7 @@ class CheckNoSpaceAfter(LexRule):
             if e < len(filebuf) and filebuf[e] in self._spaces:
                 self.error(
                     loc, "space not allowed space after '{0}'".format(
-                        filebuf[loc.start:loc.end]))
+                        bytes(filebuf[loc.start:loc.end])))
 
     @staticmethod
     def test(runner):
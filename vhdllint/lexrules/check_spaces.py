@@ -19,7 +19,7 @@ class CheckSpaces(LexRule):
                               tokens.Tok.Greater, tokens.Tok.Greater_Equal,
                               tokens.Tok.Double_Arrow]
         self._not_before = [tokens.Tok.Comma, tokens.Tok.Semi_Colon]
-        self._prev_tok = tokens.Tok.Invalid
+        self.toks = self._before_after + self._not_before
 
     def has_before(self, loc, filebuf):
         return loc.start > 0 and filebuf[loc.start - 1] in self._spaces
@@ -41,15 +41,13 @@ class CheckSpaces(LexRule):
 
     def check(self, loc, filebuf, tok):
         if tok in self._before_after:
-            s = filebuf[loc.start:loc.end]
+            s = bytes(filebuf[loc.start:loc.end])
             self.check_before(loc, filebuf, s)
             self.check_after(loc, filebuf, s)
         elif tok in self._not_before:
-            s = filebuf[loc.start:loc.end]
+            s = bytes(filebuf[loc.start:loc.end])
             self.check_not_before(loc, filebuf, s)
 
-        self._prev_tok = tok
-
     @staticmethod
     def test(runner):
         rule = CheckSpaces()
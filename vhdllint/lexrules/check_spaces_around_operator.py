@@ -1,9 +1,9 @@
-from vhdllint.lexrules import LexRule
+from vhdllint.lexrules import LexStreamRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 import libghdl.tokens as tokens
 
 
-class CheckSpacesAroundOperator(LexRule):
+class CheckSpacesAroundOperator(LexStreamRule):
     """Check operators have a space before and after."""
     # ... for some extended definition of operators.
 
@@ -11,29 +11,44 @@ class CheckSpacesAroundOperator(LexRule):
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
-        self._operators = [tokens.Tok.Assign,
-                           tokens.Tok.Equal, tokens.Tok.Not_Equal,
-                           tokens.Tok.Less, tokens.Tok.Less_Equal,
-                           tokens.Tok.Greater, tokens.Tok.Greater_Equal,
-                           tokens.Tok.Plus,
-                           tokens.Tok.Ampersand,  # tokens.Tok.Star,
-                           tokens.Tok.Slash]
+        self._operators = frozenset([
+            tokens.Tok.Assign,
+            tokens.Tok.Equal, tokens.Tok.Not_Equal,
+            tokens.Tok.Less, tokens.Tok.Less_Equal,
+            tokens.Tok.Greater, tokens.Tok.Greater_Equal,
+            tokens.Tok.Plus,
+            tokens.Tok.Ampersand,  # tokens.Tok.Star,
+            tokens.Tok.Slash])
         self._spaces = b" \t\r\n"
 
-    def check(self, loc, filebuf, tok):
-        if tok in self._operators:
-            s = filebuf[loc.start:loc.end]
-            if loc.start > 0 and filebuf[loc.start - 1] not in self._spaces:
+    def check(self, loc, filebuf, stream):
+        ops = self._operators
+        spaces = self._spaces
+        length = len(filebuf)
+        starts = stream.starts
+        ends = stream.ends
+        # Only the operators are handled in Python.
+        for i in [i for i, tok in enumerate(stream.kinds) if tok in ops]:
+            start = starts[i]
+            end = ends[i]
+            before = start == 0 or filebuf[start - 1] in spaces
+            after = end >= length or filebuf[end] in spaces
+            multiple = (after and end + 1 < length
+                        and filebuf[end] in b" \t"
+                        and filebuf[end + 1] in b" \t")
+            if before and after and not multiple:
+                continue
+            tloc = stream.get_location(loc.filename, i)
+            s = bytes(filebuf[start:end])
+            if not before:
                 self.error(
-                    loc, "missing space before operator '{0}'".format(s))
-            if loc.end < len(filebuf) and filebuf[loc.end] not in self._spaces:
+                    tloc, "missing space before operator '{0}'".format(s))
+            if not after:
                 self.error(
-                    loc, "missing space after operator '{0}'".format(s))
-            elif (loc.end < len(filebuf) + 1
-                  and filebuf[loc.end] in b" \t"
-                  and filebuf[loc.end + 1] in b" \t"):
+                    tloc, "missing space after operator '{0}'".format(s))
+            elif multiple:
                 self.error(
-                    loc, "multiple spaces after operator '{0}'".format(s))
+                    tloc, "multiple spaces after operator '{0}'".format(s))
 
     @staticmethod
     def test(runner):
@@ -0,0 +1,360 @@
+"""Language Server Protocol front end.
+
+   The server communicates with the editor on stdin and stdout (JSON-RPC
+   with Content-Length headers).  The documents are kept in memory, and
+   are written to a temporary directory to be checked.
+
+   When a document is opened or modified, the file and lexical rules are
+   executed immediately and their diagnostics are published.  The other
+   rules (which need to parse and analyze the files) are executed once the
+   document hasn't been modified for DEBOUNCE_DELAY; the other open
+   documents (and the files given on the command line) are used as
+   --import files.  Such a run is cancelled (and restarted later) when a
+   new message is received; this is checked before each file is parsed
+   and before each unit is checked."""
+
+import bisect
+import json
+import os
+import re
+import select
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from vhdllint.rulesexec import RulesExec, test_failed
+from vhdllint.utils import line_starts, col_to_offset
+
+try:
+    from urllib.parse import urlparse, unquote
+except ImportError:
+    from urlparse import urlparse
+    from urllib import unquote
+
+# Delay (in seconds) without modifications before a complete check.
+DEBOUNCE_DELAY = 0.5
+
+# Diagnostics are 'filename:line:col: [rule] message'.
+_diag_re = re.compile(r'^(.*):(\d+):(\d+): \[([^\]]*)\] (.*)$')
+
+# Line terminators of the LSP.
+_lsp_eol_re = re.compile(b'\r\n|\r|\n')
+
+# LSP constants.
+SYNC_FULL = 1
+SEVERITY_ERROR = 1
+METHOD_NOT_FOUND = -32601
+
+
+class Cancelled(Exception):
+    """Raised when a check is cancelled by a new message."""
+    pass
+
+
+class Connection(object):
+    """JSON-RPC messages on file descriptors."""
+
+    def __init__(self, rfd, wfile):
+        self._rfd = rfd
+        self._wfile = wfile
+        self._buf = b''
+        self._eof = False
+
+    def _message_length(self):
+        """Return the length (with the header) of the first message in the
+           buffer, or 0 if it is not complete."""
+        end = self._buf.find(b'\r\n\r\n')
+        if end < 0:
+            return 0
+        length = 0
+        for line in self._buf[:end].split(b'\r\n'):
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'content-length':
+                length = int(value)
+        if len(self._buf) < end + 4 + length:
+            return 0
+        return end + 4 + length
+
+    def _fill(self, timeout):
+        """Read available data, waiting at most timeout (None for no
+           limit)."""
+        r, _, _ = select.select([self._rfd], [], [], timeout)
+        if r:
+            data = os.read(self._rfd, 65536)
+            if data:
+                self._buf += data
+            else:
+                self._eof = True
+
+    def pending(self, timeout=0):
+        """Return True if a message (or the end of the input) is available
+           within timeout."""
+        if self._eof or self._message_length() != 0:
+            return True
+        self._fill(timeout)
+        return self._eof or self._message_length() != 0
+
+    def read(self):
+        """Return the next message, or None at the end of the input."""
+        while True:
+            n = self._message_length()
+            if n != 0:
+                msg = self._buf[:n]
+                self._buf = self._buf[n:]
+                return json.loads(
+                    msg[msg.find(b'\r\n\r\n') + 4:].decode('utf-8'))
+            if self._eof:
+                return None
+            self._fill(None)
+
+    def write(self, msg):
+        body = json.dumps(msg).encode('utf-8')
+        self._wfile.write('Content-Length: {0}\r\n\r\n'.format(
+            len(body)).encode('ascii') + body)
+        self._wfile.flush()
+
+
+class LspExec(RulesExec):
+    """Executor which can execute only the file and lexical rules, and which
+       can be cancelled."""
+
+    def __init__(self, rules, is_cancelled):
+        super(LspExec, self).__init__(quiet=True)
+        self.copy_rules(rules)
+        self._is_cancelled = is_cancelled
+        self.cheap = False
+
+    def needs_parse(self):
+        return not self.cheap and super(LspExec, self).needs_parse()
+
+    def _poll(self):
+        if self._is_cancelled():
+            raise Cancelled()
+
+    def _check_syntax(self, input):
+        self._poll()
+        super(LspExec, self)._check_syntax(input)
+
+    def _check_sem(self, input, unit):
+        self._poll()
+        super(LspExec, self)._check_sem(input, unit)
+
+
+def uri_to_basename(uri):
+    return os.path.basename(unquote(urlparse(uri).path))
+
+
+class Positions(object):
+    """Convert libghdl locations in the text buf (utf-8 bytes) to LSP
+       positions (UTF-16 code units, and the LSP line terminators)."""
+
+    def __init__(self, buf):
+        self._buf = buf
+        self._ghdl_starts = line_starts(buf)
+        self._lsp_starts = [0] + [m.end() for m in _lsp_eol_re.finditer(buf)]
+
+    def offset(self, line, col):
+        """Return the offset in the text of line and col (libghdl, where
+           tabs are expanded)."""
+        if line > len(self._ghdl_starts):
+            return len(self._buf)
+        return col_to_offset(self._buf, self._ghdl_starts[line - 1], col)
+
+    def position(self, line, col):
+        """Return the LSP (line, character) of line and col (libghdl)."""
+        off = self.offset(line, col)
+        n = bisect.bisect_right(self._lsp_starts, off) - 1
+        text = self._buf[self._lsp_starts[n]:off].decode('utf-8', 'replace')
+        return n, len(text.encode('utf-16-le')) // 2
+
+
+class LspServer(object):
+    def __init__(self, rules, imports, conn):
+        self._conn = conn
+        self._exe = LspExec(rules, lambda: conn.pending(0))
+        self._imports = imports
+        self._tmpdir = tempfile.mkdtemp(prefix='vhdllint-lsp-')
+        self._docs = {}             # Text (utf-8) of the documents by uri
+        self._paths = {}            # Temporary file of the documents by uri
+        self._pending = set()       # Documents to be completely checked
+        self._deadline = None
+        self._exit = False
+
+    def run(self):
+        """Handle messages until the exit notification."""
+        try:
+            while not self._exit:
+                timeout = None
+                if self._pending:
+                    timeout = max(0, self._deadline - time.time())
+                if self._conn.pending(timeout):
+                    msg = self._conn.read()
+                    if msg is None:
+                        break
+                    self.dispatch(msg)
+                else:
+                    self.check_pending()
+        finally:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def dispatch(self, msg):
+        method = msg.get('method')
+        params = msg.get('params', {})
+        if method == 'initialize':
+            self.reply(msg, {'capabilities': {
+                'textDocumentSync': {'openClose': True,
+                                     'change': SYNC_FULL}}})
+        elif method == 'shutdown':
+            self.reply(msg, None)
+        elif method == 'exit':
+            self._exit = True
+        elif method == 'textDocument/didOpen':
+            doc = params['textDocument']
+            self.update(doc['uri'], doc['text'])
+        elif method == 'textDocument/didChange':
+            # Full synchronization: the last change is the whole text.
+            self.update(params['textDocument']['uri'],
+                        params['contentChanges'][-1]['text'])
+        elif method == 'textDocument/didClose':
+            self.close(params['textDocument']['uri'])
+        elif 'id' in msg and method is not None:
+            self._conn.write({'jsonrpc': '2.0', 'id': msg['id'],
+                              'error': {'code': METHOD_NOT_FOUND,
+                                        'message': 'unknown method'}})
+        # Other notifications are ignored.
+
+    def reply(self, msg, result):
+        self._conn.write({'jsonrpc': '2.0', 'id': msg['id'],
+                          'result': result})
+
+    def update(self, uri, text):
+        """Document uri is now text: check it with the file and lexical
+           rules, and schedule a complete check."""
+        path = self._paths.get(uri)
+        if path is None:
+            # One directory per document, as documents may have the same
+            # name.
+            d = os.path.join(self._tmpdir, str(len(self._paths)))
+            os.mkdir(d)
+            path = os.path.join(d, uri_to_basename(uri))
+            self._paths[uri] = path
+        self._docs[uri] = text.encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(self._docs[uri])
+        self.check(uri, True)
+        self._pending.add(uri)
+        self._deadline = time.time() + DEBOUNCE_DELAY
+
+    def close(self, uri):
+        self._pending.discard(uri)
+        self._docs.pop(uri, None)
+        path = self._paths.pop(uri, None)
+        if path is not None:
+            os.remove(path)
+        self.publish(uri, [])
+
+    def check_pending(self):
+        """Completely check the scheduled documents, until a message is
+           received."""
+        for uri in sorted(self._pending):
+            try:
+                self.check(uri, False)
+            except Cancelled:
+                return
+            self._pending.discard(uri)
+
+    def check(self, uri, cheap):
+        """Check document uri (only with the file and lexical rules if
+           cheap) and publish the diagnostics."""
+        exe = self._exe
+        path = self._paths[uri]
+        files = [path]
+        imports = [p for u, p in self._paths.items() if u != uri]
+        if not cheap and (imports or self._imports):
+            files += ['--import'] + imports + self._imports
+        messages = []
+        exe.cheap = cheap
+        exe.reset()
+        exe.set_output(messages.append)
+        try:
+            exe.execute_args(exe.parse_args(files))
+        except SystemExit:
+            # Fatal error, the messages are still published.
+            pass
+        finally:
+            exe.set_output(None)
+        self.publish(uri, self.diagnostics(uri, path, messages))
+
+    def diagnostics(self, uri, path, messages):
+        """Convert messages (for document uri in file path) to LSP
+           diagnostics."""
+        pos = Positions(self._docs[uri])
+        res = []
+        for msg in messages:
+            m = _diag_re.match(msg.rstrip('\n'))
+            if m is None or m.group(1) != path:
+                continue
+            line, char = pos.position(int(m.group(2)), int(m.group(3)))
+            res.append({'range': {'start': {'line': line, 'character': char},
+                                  'end': {'line': line,
+                                          'character': char + 1}},
+                        'severity': SEVERITY_ERROR,
+                        'source': 'vhdllint',
+                        'code': m.group(4),
+                        'message': m.group(5)})
+        return res
+
+    def publish(self, uri, diags):
+        self._conn.write({'jsonrpc': '2.0',
+                          'method': 'textDocument/publishDiagnostics',
+                          'params': {'uri': uri, 'diagnostics': diags}})
+
+
+def main(rules, imports):
+    """Run the server for rules, with imports as --import files."""
+    # The protocol uses stdout, anything else goes to stderr.
+    out = os.fdopen(os.dup(sys.stdout.fileno()), 'wb')
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    conn = Connection(sys.stdin.fileno(), out)
+    LspServer(rules, imports, conn).run()
+
+
+def test(runner):
+    """Testsuite of the server (runner is the executor of the testsuite)."""
+    print('  test: positions')
+    # A form feed is not a line terminator, a surrogate pair is two UTF-16
+    # code units.
+    pos = Positions(u'a\fb\n\t\u00e9\u20ac\U0001d11e x\r\n'.encode('utf-8'))
+    if pos.position(2, 9) != (1, 1) or pos.position(2, 18) != (1, 5):
+        test_failed(runner, 'lsp', 'bad position conversion')
+
+    print('  test: stdio round trip')
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          'vhdllint')
+    proc = subprocess.Popen([sys.executable, script, '--no-cache',
+                             '--rule=NoSpaceEOL', '--lsp'],
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    conn = Connection(proc.stdout.fileno(), proc.stdin)
+    uri = 'file:///tmp/t.vhdl'
+    conn.write({'jsonrpc': '2.0', 'id': 1, 'method': 'initialize',
+                'params': {}})
+    conn.write({'jsonrpc': '2.0', 'method': 'textDocument/didOpen',
+                'params': {'textDocument': {
+                    'uri': uri, 'languageId': 'vhdl', 'version': 1,
+                    'text': u'-- a\fb\n-- \u00e9\u20ac\U0001d11e x \n'}}})
+    diags = None
+    while diags is None:
+        msg = conn.read()
+        if msg is None:
+            break
+        if msg.get('method') == 'textDocument/publishDiagnostics':
+            diags = msg['params']['diagnostics']
+    conn.write({'jsonrpc': '2.0', 'id': 2, 'method': 'shutdown'})
+    conn.write({'jsonrpc': '2.0', 'method': 'exit'})
+    proc.stdin.close()
+    proc.wait()
+    if diags is None or len(diags) != 1 \
+       or diags[0]['range']['start'] != {'line': 1, 'character': 9}:
+        test_failed(runner, 'lsp', 'bad diagnostics {0}'.format(diags))
@@ -2,6 +2,7 @@ import ctypes
 import libghdl.iirs as iirs
 import libghdl.thin as thin
 import libghdl.thinutils as thinutils
+from vhdllint.utils import Location_To_File_Line
 
 
 def _is_interface_port_generic(node):
@@ -37,17 +38,38 @@ def is_std_logic_or_std_logic_vector(typ):
     return is_std_logic(typ) or is_std_logic_vector(typ)
 
 
+# Identifiers (as they appear in the sources) indexed by node, identifier
+# and location.  Nodes may be freed (like names resolved by the analysis)
+# and reused for another construct, so the node alone is not a key.  The
+# cache must also be cleared when units are purged (the source files are
+# then freed).
+_identifier_strs = {}
+
+
+def clear_identifier_cache():
+    """Forget the identifiers of get_identifier_str.  Must be called when
+       design files are purged."""
+    _identifier_strs.clear()
+
+
 def get_identifier_str(n):
     """Return the identifier (as it appears in the sources) for node n.
 
-    The node n must have an identifier field.  There is no case conversion."""
+    The node n must have an identifier field.  There is no case conversion.
+    The result is memorized, as the same declarations are often referenced
+    many times."""
     ident = iirs.Get_Identifier(n)
-    id_len = thin.Get_Name_Length(ident)
     loc = iirs.Get_Location(n)
-    fe = thin.Location_To_File(loc)
-    pos = thin.Location_File_To_Pos(loc, fe)
-    fptr = thin.Get_File_Buffer(fe)
-    return ctypes.string_at(fptr + pos, id_len).decode('latin-1')
+    key = (n, ident, loc)
+    res = _identifier_strs.get(key)
+    if res is None:
+        id_len = thin.Get_Name_Length(ident)
+        fe = thin.Location_To_File(loc)
+        pos = thin.Location_File_To_Pos(loc, fe)
+        fptr = thin.Get_File_Buffer(fe)
+        res = ctypes.string_at(fptr + pos, id_len).decode('latin-1')
+        _identifier_strs[key] = res
+    return res
 
 
 def is_predefined_node(n):
@@ -76,11 +98,74 @@ def is_one_alt(alts):
 def is_same_line(loc1, loc2):
     """Return True iff loc1 and loc2 point to the same line in the
     same file."""
-    fe = thin.Location_To_File(loc1)
-    if fe != thin.Location_To_File(loc2):
-        return False
-    line = thin.Location_File_To_Line(loc1, fe)
-    return line == thin.Location_File_To_Line(loc2, fe)
+    return Location_To_File_Line(loc1) == Location_To_File_Line(loc2)
+
+
+def get_dependence_units(unit):
+    """Return the list of design units on which design unit unit (which must
+    have been analyzed) directly depends."""
+    res = []
+    for dep in thinutils.list_iter(iirs.Get_Dependence_List(unit)):
+        k = iirs.Get_Kind(dep)
+        if k == iirs.Iir_Kind.Design_Unit:
+            res.append(dep)
+        elif k == iirs.Iir_Kind.Entity_Aspect_Entity:
+            ent = iirs.Get_Named_Entity(iirs.Get_Entity_Name(dep))
+            if ent != thin.Null_Iir:
+                res.append(iirs.Get_Design_Unit(ent))
+    return res
+
+
+def get_entity_library(entity):
+    """Return the library of entity (an entity declaration)."""
+    return iirs.Get_Library(
+        iirs.Get_Design_File(iirs.Get_Design_Unit(entity)))
+
+
+def get_library_architectures(lib):
+    """Return the lists of design units of the architectures of library
+    lib, indexed by the identifier of their entity.  The units may not be
+    analyzed."""
+    res = {}
+    for f in thinutils.chain_iter(iirs.Get_Design_File_Chain(lib)):
+        for unit in thinutils.chain_iter(iirs.Get_First_Design_Unit(f)):
+            lu = iirs.Get_Library_Unit(unit)
+            if lu != thin.Null_Iir \
+               and iirs.Get_Kind(lu) == iirs.Iir_Kind.Architecture_Body:
+                ident = iirs.Get_Identifier(iirs.Get_Entity_Name(lu))
+                res.setdefault(ident, []).append(unit)
+    return res
+
+
+def get_architectures(entity):
+    """Return the list of design units of the architectures of entity (an
+    entity declaration) in its library.  The units may not be analyzed.
+    The library is walked, see get_library_architectures to find the
+    architectures of several entities."""
+    archs = get_library_architectures(get_entity_library(entity))
+    return archs.get(iirs.Get_Identifier(entity), [])
+
+
+def get_name_str(ident):
+    """Return the name (in lower case for a basic identifier) of name id
+    ident."""
+    s = thin.Get_Name_Ptr(ident)
+    return s if isinstance(s, str) else s.decode('latin-1')
+
+
+def get_unit_identity(unit):
+    """Return a string that identifies design unit unit (which must have
+    been parsed) across executions: its library, the kind of its library
+    unit and its name."""
+    lu = iirs.Get_Library_Unit(unit)
+    k = iirs.Get_Kind(lu)
+    name = get_name_str(iirs.Get_Identifier(lu))
+    if k == iirs.Iir_Kind.Architecture_Body:
+        name += ' of ' + get_name_str(
+            iirs.Get_Identifier(iirs.Get_Entity_Name(lu)))
+    lib = iirs.Get_Library(iirs.Get_Design_File(unit))
+    return '{0}:{1}:{2}'.format(
+        get_name_str(iirs.Get_Identifier(lib)), k, name)
 
 
 def extract_packages_from_context_clause(dsgn):
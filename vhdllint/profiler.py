@@ -0,0 +1,152 @@
+"""Profiling of the rules.
+
+   The check method of each rule is wrapped to measure the time spent in
+   the rule, the number of calls and the number of diagnostics.  These are
+   summed by rule, by stage and by input file.  The executor also measures
+   the time of each of its phases (reading, parsing and analyzing the
+   files, and executing the rules of each stage)."""
+
+import json
+import time
+
+_clock = getattr(time, 'perf_counter', time.time)
+
+# Number of files displayed in the report.
+NBR_FILES_REPORTED = 10
+
+
+class Profiler(object):
+    def __init__(self):
+        # Statistics ([time, calls, diagnostics]) by rule name, by stage
+        # and by file.
+        self.rules = {}
+        self.stages = {}
+        self.files = {}
+        # Time and number of calls (and no diagnostics) by executor phase.
+        self.phases = {}
+        # Rules wrapped, indexed by instance name.
+        self._instances = {}
+        self.json_file = None       # Where to save the results
+
+    def wrap(self, rule, stage):
+        """Wrap the check method of rule (which is executed during stage
+           stage), and its enter_ and leave_ callbacks if it is a visitor
+           rule."""
+        for attr in dir(rule):
+            if attr == 'check' or attr.startswith(('enter_', 'leave_')):
+                self._wrap_method(rule, attr, stage)
+
+    def _wrap_method(self, rule, attr, stage):
+        if attr in vars(rule):
+            # Already wrapped.
+            return
+        check = getattr(rule, attr)
+        name = self._rule_name(rule)
+
+        def profiled_check(*args):
+            # The runner of the rule may change.
+            run = rule._run
+            nbr_errors = run.get_nbr_errors()
+            start = _clock()
+            try:
+                return check(*args)
+            finally:
+                self.add(name, stage, run.get_current_filename(),
+                         _clock() - start, run.get_nbr_errors() - nbr_errors)
+        setattr(rule, attr, profiled_check)
+
+    def _rule_name(self, rule):
+        """Return the name of rule in the statistics: the name of the
+           instance, with a suffix (like '#2') if other instances (with
+           another configuration) have the same name."""
+        instances = self._instances.setdefault(rule._rulename, [])
+        for i, r in enumerate(instances):
+            if r is rule:
+                break
+        else:
+            i = len(instances)
+            instances.append(rule)
+        if i == 0:
+            return rule._rulename
+        return '{0}#{1}'.format(rule._rulename, i + 1)
+
+    @staticmethod
+    def _add(table, key, t, calls, diags):
+        e = table.get(key)
+        if e is None:
+            table[key] = [t, calls, diags]
+        else:
+            e[0] += t
+            e[1] += calls
+            e[2] += diags
+
+    def add(self, name, stage, filename, t, diags):
+        """Record a call of rule name."""
+        self._add(self.rules, name, t, 1, diags)
+        self._add(self.stages, stage, t, 1, diags)
+        self._add(self.files, filename, t, 1, diags)
+
+    def add_phase(self, phase, t):
+        """Record t seconds spent by the executor in phase."""
+        self._add(self.phases, phase, t, 1, 0)
+
+    def time_phase(self, phase, func, *args):
+        """Call func with args and record the time spent in phase."""
+        start = _clock()
+        try:
+            return func(*args)
+        finally:
+            self.add_phase(phase, _clock() - start)
+
+    def get_data(self):
+        return (self.rules, self.stages, self.files, self.phases)
+
+    def merge(self, data):
+        """Add results from get_data of another profiler."""
+        for table, other in zip(self.get_data(), data):
+            for k, (t, calls, diags) in other.items():
+                self._add(table, k, t, calls, diags)
+
+    @staticmethod
+    def _disp_table(out, title, items):
+        out.write('{0:<32} {1:>10} {2:>10} {3:>8}\n'.format(
+            title, 'time (s)', 'calls', 'diags'))
+        for k, (t, calls, diags) in items:
+            out.write('{0:<32} {1:>10.3f} {2:>10} {3:>8}\n'.format(
+                k, t, calls, diags))
+
+    def report(self, out, stages, phases):
+        """Display the results on out.  stages and phases are the lists of
+           stage and phase names, in order."""
+        by_time = lambda kv: (-kv[1][0], kv[0])
+        if self.phases:
+            out.write('{0:<32} {1:>10} {2:>10}\n'.format(
+                'phase', 'time (s)', 'calls'))
+            for p in phases:
+                if p in self.phases:
+                    t, calls, _ = self.phases[p]
+                    out.write('{0:<32} {1:>10.3f} {2:>10}\n'.format(
+                        p, t, calls))
+            out.write('\n')
+        self._disp_table(out, 'rule', sorted(self.rules.items(), key=by_time))
+        out.write('\n')
+        self._disp_table(out, 'stage', [(s, self.stages[s]) for s in stages
+                                        if s in self.stages])
+        out.write('\n')
+        files = sorted(self.files.items(), key=by_time)
+        self._disp_table(out, 'file', files[:NBR_FILES_REPORTED])
+        if len(files) > NBR_FILES_REPORTED:
+            out.write('({0} more files)\n'.format(
+                len(files) - NBR_FILES_REPORTED))
+
+    def save(self, filename):
+        """Write the results in JSON to filename."""
+        def conv(table):
+            return dict([(k, {'time': t, 'calls': calls, 'diagnostics': diags})
+                         for k, (t, calls, diags) in table.items()])
+        with open(filename, 'w') as f:
+            json.dump({'rules': conv(self.rules),
+                       'stages': conv(self.stages),
+                       'files': conv(self.files),
+                       'phases': conv(self.phases)}, f, indent=1,
+                      sort_keys=True)
@@ -1,3 +1,6 @@
+from vhdllint.cache import config_repr
+
+
 class Rule(object):
     def __init__(self, rulename):
         if rulename:
@@ -8,6 +11,19 @@ class Rule(object):
 
     def set_runner(self, run):
         self._run = run
+        self.config()
+
+    def config(self):
+        """Return a string for the configuration of the rule, ie the
+           attributes set by its constructor.  It is computed when the rule
+           is added to an executor, before the rule keeps any state."""
+        if getattr(self, '_config', None) is None:
+            # The check method is in the attributes when profiled.
+            attrs = [(k, v) for k, v in vars(self).items()
+                     if k not in ('_run', 'check', '_config')]
+            attrs.sort(key=lambda kv: kv[0])
+            self._config = config_repr(attrs)
+        return self._config
 
     def error(self, loc, msg):
         self._run.error("{0}:{1}:{2}: [{3}] {4}\n".format(
@@ -2,26 +2,78 @@ import libghdl.thin as thin
 import libghdl.thinutils as thinutils
 import libghdl.tokens as tokens
 import libghdl.iirs as iirs
-from utils import Location, TokLocation, fatal
-from filerules import FileRule
-from lexrules import LexRule
-from syntaxrules import SyntaxRule, SyntaxNodeRule
-from semrules import SemRule, SemNodeRule
-from synthrules import SynthesisRule
-import ctypes
+from vhdllint.utils import Location, FileLines, file_buffer, \
+    release_file_buffer, discard_file_buffer, can_discard_file_buffer, \
+    forget_all_files, capture_stderr, fatal
+from vhdllint.filerules import FileRule
+from vhdllint.lexrules import LexRule, LexStreamRule
+from vhdllint.syntaxrules import SyntaxRule, SyntaxNodeRule, \
+    SyntaxVisitorRule, SyntaxWalker
+from vhdllint.semrules import SemRule, SemNodeRule
+from vhdllint.synthrules import SynthesisRule
+import vhdllint.cache as cache
+import vhdllint.importcache as importcache
+import vhdllint.nodeutils as nodeutils
+import vhdllint.unitindex as unitindex
+import vhdllint.unitscan as unitscan
+from vhdllint.profiler import Profiler
+from vhdllint.tokstream import TokenStream
+from vhdllint.astmirror import AstMirror
+import hashlib
+import multiprocessing
 import os.path
+import pickle
+import shutil
+import subprocess
 import sys
+import tempfile
+import traceback
+
+# Stages of the execution, in order.  The file and lexical stages are done
+# file after file, the others stage after stage.  Diagnostics are sorted in
+# that order when the results of several jobs are merged.
+STAGES = ('file', 'lex', 'syntax', 'sem', 'synth')
+STAGE_FILE, STAGE_LEX, STAGE_SYNTAX, STAGE_SEM, STAGE_SYNTH = range(5)
+
+# Phases of the execution measured by the profiler.
+PHASES = ('read', 'file', 'lex', 'parse', 'syntax', 'analyze', 'sem',
+          'synth')
 
 
 class RuleInput(object):
-    def __init__(self, filename, fe):
+    def __init__(self, filename, fe, index=0):
         self.filename = filename
+        self.index = index          # Position on the command line
         self.fe = fe                # File entry
         self.filebuf = None
         self.ast = None
         self.units_ast = []         # List of units
         self.properties = []        # List of properties (from cmd line)
-        self.comments = {}          # Comments indexed by line number
+        self.digest = None          # Hash of the content (for the cache)
+        self.added = False          # Units added in the work library
+        self.mirror_kinds = ()      # Kinds of the constructs to mirror
+        self._comments = None
+        self._mirror = None
+
+    @property
+    def comments(self):
+        """Comments indexed by line number (as a tuple of start and end
+           position).  The file is scanned only if needed."""
+        if self._comments is None:
+            self._comments = TokenStream.scan(self.fe).comments()
+        return self._comments
+
+    def set_comments(self, comments):
+        self._comments = comments
+
+    @property
+    def mirror(self):
+        """Mirror (an astmirror.AstMirror) of the constructs of the units
+           (only those of mirror_kinds).  A unit is mirrored only if
+           needed."""
+        if self._mirror is None:
+            self._mirror = AstMirror(self.mirror_kinds)
+        return self._mirror
 
 
 class RulesExec(object):
@@ -36,6 +88,38 @@ class RulesExec(object):
         self._synth_rules = []
         self._nbr_errors = 0
         self._nbr_files = 0
+        self._jobs = 1
+        self._cache = None
+        self._options = []          # Options given to libghdl
+        # When not None, diagnostics are also appended to this list (so
+        # that they can be saved in the cache).
+        self._recorded = None
+        # When not None, diagnostics are kept in this list (as tuples of
+        # stage, input index and message) instead of being displayed.
+        self._messages = None
+        self._stage = STAGE_FILE
+        self._index = 0
+        self._filenames = {}        # File names indexed by input index
+        self._profiler = None
+        self._output = None         # Function to display a diagnostic
+        # Function to display the messages of libghdl (None for stderr),
+        # and the messages kept by a worker of execute_jobs for it.
+        self._libghdl_output = None
+        self._libghdl_messages = []
+        self._source_files = []     # Source files kept in libghdl
+        self._import_cache = None   # Library of the --import files
+        self._fresh_imports = set()  # --import files in that library
+        self._imports_purged = False
+        self._save_imports = True
+        self._imports_on_demand = False
+        self._unit_index = None     # unitindex.UnitIndex of the project
+        self._scans = None          # unitindex.UnitIndex of the scans
+        # Messages of libghdl of the units analyzed by _check_units,
+        # indexed by unit.
+        self._analyses = {}
+        # Architectures of the libraries during _check_units (see
+        # get_architectures).
+        self._architectures = {}
 
     def add(self, rule):
         """Add a rule"""
@@ -56,6 +140,40 @@ class RulesExec(object):
         else:
             fatal("unknown class for rule {0}".format(rule.rulename))
         rule.set_runner(self)
+        if self._profiler is not None:
+            self._profiler.wrap(rule, STAGES[self._rule_stage(rule)])
+
+    @staticmethod
+    def _rule_stage(rule):
+        """Return the stage during which rule is executed."""
+        if isinstance(rule, FileRule):
+            return STAGE_FILE
+        elif isinstance(rule, LexRule):
+            return STAGE_LEX
+        elif isinstance(rule, (SyntaxRule, SyntaxNodeRule)):
+            return STAGE_SYNTAX
+        elif isinstance(rule, (SemRule, SemNodeRule)):
+            return STAGE_SEM
+        else:
+            return STAGE_SYNTH
+
+    def copy_rules(self, rules):
+        """Add the rules of rules (another RulesExec), and use its
+           configuration (cache, libghdl options and profiler)."""
+        self._cache = rules._cache
+        self._imports_on_demand = rules._imports_on_demand
+        self._unit_index = rules._unit_index
+        self._options = rules._options
+        for r in rules.get_rules():
+            self.add(r)
+        if rules.get_profiler() is not None:
+            self.set_profiler(rules.get_profiler())
+
+    def get_rules(self):
+        """Return the list of rules, in the order of the stages."""
+        return (self._file_rules + self._lex_rules + self._syntax_rules
+                + self._syntax_node_rules + self._sem_rules
+                + self._sem_node_rules + self._synth_rules)
 
     def get_nbr_errors(self):
         return self._nbr_errors
@@ -63,15 +181,111 @@ class RulesExec(object):
     def get_nbr_files(self):
         return self._nbr_files
 
+    def get_current_filename(self):
+        """Return the name of the file being checked."""
+        return self._filenames.get(self._index)
+
+    def set_profiler(self, profiler):
+        """Use profiler (a profiler.Profiler) to measure the rules."""
+        self._profiler = profiler
+        for r in self.get_rules():
+            profiler.wrap(r, STAGES[self._rule_stage(r)])
+
+    def get_profiler(self):
+        return self._profiler
+
+    def set_jobs(self, jobs):
+        """Set the number of processes used by execute.  0 means one per
+           cpu."""
+        if jobs == 0:
+            jobs = multiprocessing.cpu_count()
+        self._jobs = jobs
+
+    def get_cache(self):
+        """Return the cache.ResultCache used, or None."""
+        return self._cache
+
+    def get_options(self):
+        """Return the libghdl options set (like --std or --ieee)."""
+        return list(self._options)
+
+    def set_cache(self, result_cache):
+        """Use result_cache (a cache.ResultCache or None) to save and
+           replay the results of the file and lexical rules."""
+        self._cache = result_cache
+        self._scans = None
+
+    def set_imports_on_demand(self, flag):
+        """If flag is True, only the --import files which declare units
+           used (directly or not) by the checked files are read."""
+        self._imports_on_demand = flag
+
+    def set_index(self, index):
+        """Use index (a unitindex.UnitIndex or None): the files of the index
+           are imported on demand."""
+        self._unit_index = index
+
+    def set_option(self, opt):
+        """Set a libghdl option.  Return 0 in case of success."""
+        res = thin.set_option(opt)
+        if res == 0:
+            self._options.append(opt)
+        return res
+
     def error(self, msg):
         self._nbr_errors += 1
-        if not self._quiet:
+        if self._recorded is not None:
+            self._recorded.append(msg)
+        if self._messages is not None:
+            self._messages.append((self._stage, self._index, msg))
+        elif self._output is not None:
+            self._output(msg)
+        elif not self._quiet:
             sys.stderr.write(msg)
 
-    def execute(self, files):
-        inputs = []
+    def set_output(self, output):
+        """Call output with each diagnostic instead of writing it on
+           stderr.  None restores the default."""
+        self._output = output
+
+    def set_libghdl_output(self, output):
+        """Call output with the messages of libghdl (the errors found when
+           parsing and analyzing the files) instead of letting libghdl
+           write them on stderr.  None restores the default."""
+        self._libghdl_output = output
+
+    def reset_work_library(self):
+        """Remove all the units of the work library.  This is brut force."""
+        nodeutils.clear_identifier_cache()
+        forget_all_files()
+        work = thin.Work_Library.value
+        if work != thin.Null_Iir:
+            for f in thinutils.chain_iter(iirs.Get_Design_File_Chain(work)):
+                thin.Purge_Design_File(f)
+            iirs.Set_Design_File_Chain(work, thin.Null_Iir)
+
+    def reset(self):
+        """Prepare for a new execution: clear the counters, discard the
+           source files read and empty the work library."""
+        self._nbr_errors = 0
+        self._nbr_files = 0
+        self._filenames = {}
+        self.reset_work_library()
+        for fe in self._source_files:
+            discard_file_buffer(fe)
+        self._source_files = []
+
+    def needs_parse(self):
+        """Return True iff some rules need the files to be parsed."""
+        return bool(self._syntax_rules or self._syntax_node_rules
+                    or self._sem_rules or self._sem_node_rules
+                    or self._synth_rules)
+
+    def parse_args(self, files):
+        """Return the list of (index, filename, props) from the command
+           line files (which contains file names and properties)."""
+        res = []
         props = ['synth']
-        # First file
         for filename in files:
             if filename.startswith('--'):
                 # Handle properties
@@ -86,62 +300,379 @@ class RulesExec(object):
                 else:
                     fatal("unknown property '{0}'".format(filename))
                 continue
+            res.append((len(res), filename, props))
+        if self._unit_index is not None:
+            given = set([os.path.normpath(f) for _, f, _ in res])
+            for filename in self._unit_index.get_filenames():
+                if os.path.normpath(filename) not in given:
+                    res.append((len(res), filename, ['import']))
+        if self._imports_on_demand or self._unit_index is not None:
+            res = self.select_imports(res)
+        return res
+
+    def _scan(self, filename):
+        """Return the unitscan.ScanResult of filename, or None.  Without an
+           index, the scans are recorded in an index of the cache directory
+           (or in memory), so that only the modified files are scanned
+           again."""
+        if self._unit_index is not None:
+            return self._unit_index.scan(filename)
+        if self._scans is None:
+            if self._cache is None:
+                path = os.path.join(os.getcwd(), unitindex.DEFAULT_INDEX)
+            else:
+                path = os.path.join(
+                    self._cache.get_directory(), 'scans',
+                    self._cache.key('scans', os.getcwd())[:16])
+            self._scans = unitindex.UnitIndex(path)
+            if self._cache is not None:
+                self._scans.load()
+        return self._scans.scan(filename, True)
+
+    def _save_scans(self):
+        """Save the scans recorded in the cache directory.  Errors are
+           ignored, this is only an optimization."""
+        if self._cache is None or self._scans is None \
+           or not self._scans.is_modified():
+            return
+        try:
+            d = os.path.dirname(self._scans._filename)
+            if not os.path.isdir(d):
+                os.makedirs(d)
+            self._scans.save()
+        except (IOError, OSError):
+            pass
+
+    def select_imports(self, args):
+        """Remove from args the --import files which are not needed by the
+           checked files.  The units declared and referenced by the files are
+           found by unitscan, so the imported files are not read by libghdl.
+           The needed files are sorted so that the units are declared
+           before being used.  The input indexes are kept."""
+        if not (self._sem_rules or self._sem_node_rules or self._synth_rules):
+            # Imported files are only needed for the analysis.
+            return [a for a in args if 'import' not in a[2]]
+        refs = set()
+        scans = {}
+        for _, filename, props in args:
+            s = self._scan(filename)
+            if s is None:
+                # Will be reported when read.
+                continue
+            if 'import' in props:
+                scans[filename] = s
+            else:
+                refs.update(s.references)
+        self._save_scans()
+        needed = unitscan.order_files(
+            sorted(unitscan.select_files(refs, scans)), scans)
+        by_name = dict([(a[1], a) for a in args])
+        return [a for a in args if 'import' not in a[2] or a[1] not in scans] \
+            + [by_name[f] for f in needed]
 
-            # Read the file
-            fid = thin.Get_Identifier(filename.encode('utf-8'))
-            fe = thin.Read_Source_File(0, fid)
-            if fe == thin.No_Source_File_Entry:
-                fatal('cannot open {0}'.format(filename))
+    def _init_libraries(self, args):
+        """Initialize libghdl (if not yet done) when the files have to be
+           analyzed.  The library of the --import files is then used if
+           possible."""
+        if not (self._sem_rules or self._sem_node_rules or self._synth_rules) \
+           or thin.Get_Libraries_Chain() != thin.Null_Iir:
+            return
+        imports = [f for _, f, props in args if 'import' in props]
+        if imports and self._cache is not None and importcache.is_supported():
+            self._import_cache = importcache.ImportCache(os.path.join(
+                self._cache.get_directory(), 'imports',
+                self._cache.key('imports', self._options, os.getcwd())[:16]))
+            self._fresh_imports = self._import_cache.setup(imports)
+            thin.analyze_init()
+            self._imports_purged = self._import_cache.purge_stale()
+        else:
+            thin.analyze_init()
 
-            fbuf = thin.Get_File_Buffer(fe)
-            flen = thin.Get_File_Length(fe)
+    def execute(self, files):
+        args = self.parse_args(files)
+        self._init_libraries(args)
+        if self._jobs > 1 and hasattr(os, 'fork'):
+            self.execute_jobs(args)
+        else:
+            self.execute_args(args)
+        if self._cache is not None:
+            self._cache.trim()
 
-            # Not very efficient (it copies the string), but let's use it
-            # for now.
-            filebuf = ctypes.string_at(fbuf, flen)
+    def _cache_key(self, stage, input, rules):
+        """Return the key in the cache for the results of rules (from stage)
+           on input, or None if the cache is not used."""
+        if self._cache is None:
+            return None
+        if input.digest is None:
+            input.digest = hashlib.sha1(input.filebuf).hexdigest()
+        return self._cache.key(STAGES[stage], self._options, input.filename,
+                               input.digest,
+                               [cache.rule_key(r) for r in rules])
 
-            input = RuleInput(filename, fe)
-            input.filebuf = filebuf
-            input.props = props
-            inputs.append(input)
+    def _replay(self, key):
+        """Replay the diagnostics saved in the cache for key.  Return the
+           cache entry, or None if not found."""
+        if key is None:
+            return None
+        res = self._cache.get(key)
+        if res is not None:
+            for msg in res['messages']:
+                self.error(msg)
+        return res
 
-            if 'import' not in input.props:
-                self._nbr_files += 1
+    def execute_jobs(self, args):
+        """Execute the rules on args using several worker processes.
 
-                # Again, not very efficient (creates the substrings).
-                flines = filebuf.splitlines(True)
+           Each worker checks a shard of the files; the other files are
+           handled like --import files so that the whole design is known.
+           The diagnostics are displayed in the same order as for a serial
+           run."""
+        checked = [idx for idx, f, props in args if 'import' not in props]
+        jobs = min(self._jobs, len(checked))
+        if jobs <= 1:
+            self.execute_args(args)
+            return
+        # Do not duplicate buffered outputs in the workers.
+        sys.stdout.flush()
+        sys.stderr.flush()
+        workers = []
+        for j in range(jobs):
+            rfd, wfd = os.pipe()
+            pid = os.fork()
+            if pid == 0:
+                os.close(rfd)
+                # Only one worker saves the library of the imports.
+                self._save_imports = j == 0
+                self._execute_shard(args, set(checked[j::jobs]), wfd)
+            os.close(wfd)
+            workers.append((pid, rfd))
+        messages = []
+        status = 0
+        for pid, rfd in workers:
+            with os.fdopen(rfd, 'rb') as f:
+                data = f.read()
+            _, st = os.waitpid(pid, 0)
+            if data:
+                nbr_files, msgs, prof, added, libghdl_msgs = \
+                    pickle.loads(data)
+                for m in libghdl_msgs:
+                    self._libghdl_write(m)
+                self._nbr_files += nbr_files
+                messages.extend(msgs)
+                if prof is not None:
+                    self._profiler.merge(prof)
+                if added:
+                    self._cache.add_size(added)
+            if st != 0 and status == 0:
+                status = st >> 8 if os.WIFEXITED(st) else 1
+        # The sort is stable, so the order within a stage and an input is
+        # kept.  The file and lexical stages are done for each file.
+        messages.sort(key=lambda m: (max(m[0], STAGE_LEX), m[1]))
+        for stage, index, msg in messages:
+            self._stage = stage
+            self._index = index
+            self.error(msg)
+        if status != 0:
+            sys.exit(status)
 
-                loc = Location(filename)
-                for r in self._file_rules:
-                    r.check(loc, flines)
+    def _execute_shard(self, args, shard, fd):
+        """Worker part of execute_jobs: check files from shard, write the
+           results on fd and exit."""
+        status = 0
+        self._messages = []
+        self._nbr_files = 0
+        try:
+            shard_args = []
+            for idx, filename, props in args:
+                if idx in shard:
+                    shard_args.append((idx, filename, props))
+                elif 'import' in props or self.needs_parse():
+                    shard_args.append((idx, filename, ['import']))
+            self.execute_args(shard_args)
+        except SystemExit as e:
+            status = e.code if isinstance(e.code, int) else 1
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                prof = None
+                if self._profiler is not None:
+                    prof = self._profiler.get_data()
+                added = 0
+                if self._cache is not None:
+                    added = self._cache.get_added()
+                pickle.dump((self._nbr_files, self._messages, prof, added,
+                             self._libghdl_messages),
+                            f, pickle.HIGHEST_PROTOCOL)
+            sys.stderr.flush()
+        finally:
+            os._exit(status)
 
-        # Then tokens
-        thin.Scanner.Flag_Comment.value = True
-        for input in inputs:
-            if 'import' not in input.props:
-                thin.Scanner.Set_File(input.fe)
-                filebuf = input.filebuf
-                while True:
-                    thin.Scanner.Scan()
-                    tok = thin.Scanner.Current_Token.value
-                    loc = TokLocation(input.filename,
-                                      thin.Scanner.Get_Current_Line(),
-                                      thin.Scanner.Get_Token_Column(),
-                                      thin.Scanner.Get_Token_Position(),
-                                      thin.Scanner.Get_Position())
-                    if tok == tokens.Tok.Comment:
-                        input.comments[loc.line] = (loc.start, loc.end)
-                    for r in self._lex_rules:
-                        r.check(loc, filebuf, tok)
-                    if tok == tokens.Tok.Eof:
-                        break
-                thin.Scanner.Close_File()
-        if not (self._syntax_rules or self._syntax_node_rules
-                or self._sem_rules or self._sem_node_rules
-                or self._synth_rules):
+    def _libghdl_call(self, phase, func, *args):
+        """Call func (a function of libghdl which may write messages) with
+           args, measured as phase.  Return its result and its messages.
+           The messages are only captured (and returned) when the cache is
+           used or when they are not written on stderr."""
+        if self._cache is None and self._libghdl_output is None:
+            return self._phase(phase, func, *args), ''
+        res, msgs = self._phase(phase, capture_stderr, func, *args)
+        self._libghdl_write(msgs)
+        return res, msgs
+
+    def _libghdl_write(self, msgs):
+        """Display msgs, messages of libghdl."""
+        if not msgs:
             return
+        if self._libghdl_output is None:
+            sys.stderr.write(msgs)
+        elif self._messages is not None:
+            # In a worker, sent with the diagnostics.
+            self._libghdl_messages.append(msgs)
+        else:
+            self._libghdl_output(msgs)
 
-        # Then syntax
+    def _phase(self, phase, func, *args):
+        """Call func with args, measured as phase by the profiler (if
+           any)."""
+        if self._profiler is None:
+            return func(*args)
+        return self._profiler.time_phase(phase, func, *args)
+
+    def _node_rules(self, table, rules, kind):
+        """Return the list of rules (from rules) to be called for a node
+           of kind kind.  The results are memorized in table."""
+        res = [r for r in rules if r.kinds is None or kind in r.kinds]
+        table[kind] = res
+        return res
+
+    def _tok_rules(self):
+        """Return a list indexed by token of the list of lexical rules to be
+           called for the token."""
+        last = max([v for k, v in vars(tokens.Tok).items()
+                    if not k.startswith('_') and isinstance(v, int)])
+        return [[r for r in self._lex_rules if r.toks is None or tok in r.toks]
+                for tok in range(last + 1)]
+
+    def _check_file(self, input):
+        """Execute the file rules on input."""
+        self._stage = STAGE_FILE
+        self._index = input.index
+
+        key = self._cache_key(STAGE_FILE, input, self._file_rules)
+        if self._replay(key) is not None:
+            return
+        self._recorded = [] if key is not None else None
+
+        # The lines are only extracted when accessed.
+        flines = FileLines(input.filebuf)
+
+        loc = Location(input.filename)
+        for r in self._file_rules:
+            r.check(loc, flines)
+
+        if key is not None:
+            self._cache.put(key, {'messages': self._recorded})
+            self._recorded = None
+
+    def _check_lex(self, input, tok_rules):
+        """Execute the lexical rules on input.  The file is scanned once,
+           the tokens are recorded and replayed to the rules (or given at
+           once to the LexStreamRules)."""
+        self._stage = STAGE_LEX
+        self._index = input.index
+        key = self._cache_key(STAGE_LEX, input, self._lex_rules)
+        res = self._replay(key)
+        if res is not None:
+            input.set_comments(dict(
+                [(line, (start, end))
+                 for line, start, end in res['comments']]))
+            return
+        self._recorded = [] if key is not None else None
+        stream = TokenStream.scan(input.fe)
+        input.set_comments(stream.comments())
+        stream.replay(input.filename, input.filebuf, tok_rules)
+        loc = Location(input.filename)
+        for r in self._lex_rules:
+            if isinstance(r, LexStreamRule):
+                r.check(loc, input.filebuf, stream)
+        if key is not None:
+            comments = [[line, start, end] for line, (start, end)
+                        in sorted(input.comments.items())]
+            self._cache.put(key, {'messages': self._recorded,
+                                  'comments': comments})
+            self._recorded = None
+
+    def execute_args(self, args):
+        inputs = self._read_files(args)
+        if inputs is None:
+            return
+        self._parse_files(inputs)
+        if self._sem_rules or self._sem_node_rules or self._synth_rules:
+            self._check_units(inputs)
+
+    def _read_file(self, idx, filename, props):
+        """Read file filename and return its RuleInput."""
+        fid = thin.Get_Identifier(filename.encode('utf-8'))
+        fe = self._phase('read', thin.Read_Source_File, 0, fid)
+        if fe == thin.No_Source_File_Entry:
+            fatal('cannot open {0}'.format(filename))
+
+        input = RuleInput(filename, fe, idx)
+        # The buffer is not copied.
+        input.filebuf = file_buffer(fe)
+        input.props = props
+        input.mirror_kinds = self._mirror_kinds()
+        return input
+
+    def _mirror_kinds(self):
+        """Return the kinds of the constructs to be mirrored for the rules
+           (see SemRule.mirror_kinds)."""
+        res = set()
+        for r in self._sem_rules + self._synth_rules:
+            res.update(r.mirror_kinds)
+        return sorted(res)
+
+    def _read_files(self, args):
+        """Read the files of args and execute the file and lexical rules.
+           Return the inputs to be parsed, or None if the files don't have
+           to be parsed."""
+        # Files are kept only if they have to be parsed.
+        keep = self.needs_parse()
+        inputs = []
+        tok_rules = self._tok_rules() if self._lex_rules else None
+        # First file and tokens, one file after the other.  Without lexical
+        # rules, files are scanned (for the comments) only if a syntax rule
+        # needs it.
+        for idx, filename, props in args:
+            self._filenames[idx] = filename
+            if 'import' in props \
+               and (not keep or filename in self._fresh_imports):
+                continue
+            input = self._read_file(idx, filename, props)
+
+            if 'import' not in props:
+                self._nbr_files += 1
+                if self._file_rules:
+                    self._phase('file', self._check_file, input)
+                if self._lex_rules:
+                    self._phase('lex', self._check_lex, input, tok_rules)
+
+            if keep:
+                inputs.append(input)
+            else:
+                # Not needed anymore, so that at most one file is in memory.
+                input.filebuf = None
+                if not release_file_buffer(input.fe):
+                    # Kept by libghdl, so discarded by reset.
+                    self._source_files.append(input.fe)
+        if not keep:
+            return None
+        return inputs
+
+    def _parse_files(self, inputs):
+        """Parse inputs (those not yet parsed) and execute the syntax
+           rules."""
         # The parser doesn't handle comments
         thin.Scanner.Flag_Comment.value = False
         # Keep extra locations
@@ -152,75 +683,307 @@ class RulesExec(object):
         # Humm, not very elegant.
         if thin.Get_Libraries_Chain() == thin.Null_Iir:
             thin.analyze_init()
+        self._stage = STAGE_SYNTAX
+        # Node rules indexed by node kind.
+        self._syntax_table = {}
+        visitors = [r for r in self._syntax_rules
+                    if isinstance(r, SyntaxVisitorRule)]
+        self._syntax_walker = SyntaxWalker(visitors) if visitors else None
+        self._sem_table = {}
         for input in inputs:
-            thin.Scanner.Set_File(input.fe)
-            loc = Location(input.filename)
-            input.ast = thin.Parse.Parse_Design_File()
+            self._index = input.index
+            if input.ast is None:
+                thin.Scanner.Set_File(input.fe)
+                input.ast, _ = self._libghdl_call(
+                    'parse', thin.Parse.Parse_Design_File)
+                # Close the file now, so that the rules can scan it (to
+                # extract comments).
+                thin.Scanner.Close_File()
+                self._source_files.append(input.fe)
             if 'import' not in input.props:
-                for r in self._syntax_rules:
-                    r.check(input, input.ast)
-                if self._syntax_node_rules:
-                    for n in thinutils.nodes_iter(input.ast):
-                        for r in self._syntax_node_rules:
-                            r.check(loc, n)
-            thin.Scanner.Close_File()
-
-        # Then semantic
-        if self._sem_rules or self._sem_node_rules or self._synth_rules:
-            # Reduce Canon
-            thin.Canon.Flag_Concurrent_Stmts.value = False
-            thin.Canon.Flag_Configurations.value = False
-            thin.Canon.Flag_Associations.value = False
-            # First add all units in the work library, so that they they are
-            # known by the analyzer.
-            for input in inputs:
-                unit_ast = iirs.Get_First_Design_Unit(input.ast)
-                while unit_ast != thin.Null_Iir:
-                    # Detach the unit from its design file
-                    next_unit_ast = iirs.Get_Chain(unit_ast)
-                    iirs.Set_Chain(unit_ast, thin.Null_Iir)
-                    # Add
-                    thin.Add_Design_Unit_Into_Library(unit_ast, False)
-                    input.units_ast.append(unit_ast)
-                    unit_ast = next_unit_ast
-            # Handle all unit
-            for input in inputs:
-                if 'import' not in input.props:
-                    for unit in input.units_ast:
-                        if iirs.Get_Library_Unit(unit) == thin.Null_Iir:
-                            # Over-written.
-                            # FIXME: remove from the list ?
-                            continue
-                        # Be sure the unit was analyzed. It could have been
-                        # already analyzed if referenced. And a unit cannot be
-                        # analyzed twice.
-                        if iirs.Get_Date_State(unit) == iirs.Date_State.Parse:
-                            thin.Finish_Compilation(unit, False)
-                            iirs.Set_Date_State(unit, iirs.Date_State.Analyze)
-                        for r in self._sem_rules:
-                            r.check(input, unit)
-                        for n in thinutils.nodes_iter(unit):
-                            for r in self._sem_node_rules:
-                                r.check(input, n)
-
-            for input in inputs:
-                if 'synth' in input.props:
-                    for unit in input.units_ast:
-                        if iirs.Get_Library_Unit(unit) == thin.Null_Iir:
-                            # Over-written.
-                            continue
-                        for r in self._synth_rules:
-                            r.check(input, unit)
+                self._phase('syntax', self._check_syntax, input)
 
+    def _check_units(self, inputs):
+        """Analyze the units of inputs (which have been parsed) and execute
+           the semantic and synthesis rules.  The units of the inputs are
+           added in the work library unless already done."""
+        # Reduce Canon
+        thin.Canon.Flag_Concurrent_Stmts.value = False
+        thin.Canon.Flag_Configurations.value = False
+        thin.Canon.Flag_Associations.value = False
+        # First add all units in the work library, so that they they are
+        # known by the analyzer.  The imported units first, so that
+        # they can be saved, and so that they don't replace the checked
+        # ones.
+        imported = [i for i in inputs if 'import' in i.props]
+        checked = [i for i in inputs if 'import' not in i.props]
+        new_imported = [i for i in imported if not i.added]
+        self._add_units(new_imported)
+        if self._import_cache is not None and self._save_imports \
+           and (new_imported or self._imports_purged):
+            # The work library only contains the imported units.
+            self._import_cache.save()
+        self._add_units([i for i in checked if not i.added])
+        if self._cache is not None:
+            self._unit_hashes(checked, imported)
+        # Cache entries of the units, for those checked in this run.
+        entries = {}
+        self._analyses = {}
+        self._architectures = {}
+        for r in self._sem_rules:
+            r.reset()
+        # Handle all unit
+        self._stage = STAGE_SEM
+        for input in checked:
+            self._index = input.index
+            for unit in input.units_ast:
+                if iirs.Get_Library_Unit(unit) == thin.Null_Iir:
+                    # Over-written.
+                    # FIXME: remove from the list ?
+                    continue
+                if self._replay_unit(input, unit, 'sem'):
+                    # Not changed, not analyzed (unless needed by
+                    # another unit).
+                    continue
+                # Be sure the unit was analyzed. It could have been
+                # already analyzed if referenced. And a unit cannot be
+                # analyzed twice.
+                if iirs.Get_Date_State(unit) == iirs.Date_State.Parse:
+                    self._analyze(unit)
+                # The messages of its analysis, which may have been done by
+                # a rule (see analyze_unit).
+                analysis = self._analyses.get(unit, '')
+                if self._cache is not None:
+                    self._recorded = []
+                self._phase('sem', self._check_sem, input, unit)
+                if self._cache is not None:
+                    entries[unit] = {
+                        'deps': self._unit_closure(unit),
+                        'analysis': analysis,
+                        'sem': self._recorded, 'synth': []}
+                    self._recorded = None
 
-def execute_and_report(rules, files):
-    # Can initialize the library, once the options were set (this will in
-    # particular create the standard package).
-    thin.analyze_init()
+        self._stage = STAGE_SYNTH
+        for input in inputs:
+            if 'synth' in input.props:
+                self._index = input.index
+                for unit in input.units_ast:
+                    if iirs.Get_Library_Unit(unit) == thin.Null_Iir:
+                        # Over-written.
+                        continue
+                    if unit not in entries \
+                       and self._replay_unit(input, unit, 'synth'):
+                        continue
+                    if unit in entries:
+                        self._recorded = entries[unit]['synth']
+                    elif iirs.Get_Date_State(unit) == \
+                            iirs.Date_State.Parse:
+                        self._analyze(unit)
+                    self._phase('synth', self._check_synth, input, unit)
+                    self._recorded = None
+
+        for input in inputs:
+            for unit in input.units_ast:
+                if unit in entries:
+                    self._cache.put(self._unit_key(input, unit),
+                                    entries[unit])
+
+    def _analyze(self, unit):
+        """Analyze unit (which has only been parsed).  When the cache is
+           used, the messages of libghdl are also returned (and kept in
+           self._analyses), so that they are replayed with the results of
+           the unit."""
+        _, res = self._libghdl_call('analyze', thin.Finish_Compilation,
+                                    unit, False)
+        iirs.Set_Date_State(unit, iirs.Date_State.Analyze)
+        self._analyses[unit] = res
+        return res
+
+    def get_architectures(self, entity):
+        """Return the list of design units of the architectures of entity,
+           like nodeutils.get_architectures.  The library of entity is
+           walked only once per check of the units, as the units are not
+           added to the libraries during the check."""
+        lib = nodeutils.get_entity_library(entity)
+        archs = self._architectures.get(lib)
+        if archs is None:
+            archs = nodeutils.get_library_architectures(lib)
+            self._architectures[lib] = archs
+        return archs.get(iirs.Get_Identifier(entity), [])
+
+    def analyze_unit(self, unit):
+        """Analyze unit (a unit of the work library) if not already done,
+           for a semantic rule which needs it (like the architectures of an
+           entity).  A unit of the library of the --import files is loaded
+           first.  Return True if the unit is analyzed."""
+        state = iirs.Get_Date_State(unit)
+        if state == iirs.Date_State.Disk and self._import_cache is not None:
+            self._libghdl_call('parse', importcache.load_unit, unit)
+            state = iirs.Get_Date_State(unit)
+        if state == iirs.Date_State.Parse:
+            self._analyze(unit)
+            state = iirs.Get_Date_State(unit)
+        return state == iirs.Date_State.Analyze
+
+    def _add_units(self, inputs):
+        """Add the units of inputs (which have been parsed) in the work
+           library."""
+        for input in inputs:
+            unit_ast = iirs.Get_First_Design_Unit(input.ast)
+            while unit_ast != thin.Null_Iir:
+                # Detach the unit from its design file
+                next_unit_ast = iirs.Get_Chain(unit_ast)
+                iirs.Set_Chain(unit_ast, thin.Null_Iir)
+                # Add
+                thin.Add_Design_Unit_Into_Library(unit_ast, False)
+                input.units_ast.append(unit_ast)
+                unit_ast = next_unit_ast
+            input.added = True
 
-    # Do the checks
+    def _unit_hashes(self, inputs, imported):
+        """Compute the hash (of the text) of the units of inputs, in
+           self._hashes (indexed by unit) and self._identity_hashes (indexed
+           by unit identity).  The text of a unit extends to the next
+           unit, and the text before the unit is included as the
+           diagnostics contain line numbers.  The imported files (imported
+           and those from the library of the imports) have a global hash,
+           in self._imports_hash."""
+        h = hashlib.sha1()
+        for f in sorted(self._fresh_imports):
+            h.update('{0}:{1}\n'.format(
+                f, self._import_cache.get_hash(f)).encode('utf-8'))
+        for input in imported:
+            h.update('{0}:{1}\n'.format(
+                input.filename,
+                hashlib.sha1(input.filebuf).hexdigest()).encode('utf-8'))
+        self._imports_hash = h.hexdigest()
+        self._hashes = {}
+        self._identity_hashes = {}
+        for input in inputs:
+            units = [u for u in input.units_ast
+                     if iirs.Get_Library_Unit(u) != thin.Null_Iir]
+            starts = [thin.Location_File_To_Pos(iirs.Get_Location(u),
+                                                input.fe) for u in units]
+            starts[0:1] = [0]
+            ends = starts[1:] + [len(input.filebuf)]
+            h = hashlib.sha1('{0}:'.format(input.filename).encode('utf-8'))
+            for unit, start, end in zip(units, starts, ends):
+                h.update(input.filebuf[start:end])
+                digest = h.hexdigest()
+                self._hashes[unit] = digest
+                self._identity_hashes[
+                    nodeutils.get_unit_identity(unit)] = digest
+
+    def _unit_key(self, input, unit):
+        """Key in the cache of the results of the semantic and synthesis
+           rules for unit."""
+        return self._cache.key(
+            'unit', self._options, self._hashes[unit], self._imports_hash,
+            'synth' in input.props,
+            [cache.rule_key(r) for r in self._sem_rules + self._sem_node_rules
+             + self._synth_rules])
+
+    def _unit_closure(self, unit):
+        """Return the units (as identities) on which unit (which has been
+           analyzed) depends, directly or not, with their hash.  Only the
+           units of the checked files are included (the imported ones are
+           part of the key).  The architectures of an entity are included
+           if a rule needs them (see SemRule.uses_architectures)."""
+        res = {}
+        todo = [unit]
+        seen = set(todo)
+        archs = any(r.uses_architectures for r in self._sem_rules)
+        while todo:
+            u = todo.pop()
+            deps = nodeutils.get_dependence_units(u)
+            lu = iirs.Get_Library_Unit(u)
+            if archs \
+               and iirs.Get_Kind(lu) == iirs.Iir_Kind.Entity_Declaration:
+                deps.extend(self.get_architectures(lu))
+            for dep in deps:
+                if dep in seen:
+                    continue
+                seen.add(dep)
+                h = self._hashes.get(dep)
+                if h is not None:
+                    res[nodeutils.get_unit_identity(dep)] = h
+                    # The dependences of a unit are known once analyzed
+                    # (an architecture may not be).
+                    if iirs.Get_Date_State(dep) == iirs.Date_State.Analyze:
+                        todo.append(dep)
+        return res
+
+    def _replay_unit(self, input, unit, stage):
+        """If neither unit nor its dependences have changed since the
+           results in the cache, replay those of stage ('sem' or 'synth')
+           and return True."""
+        if self._cache is None:
+            return False
+        res = self._cache.get(self._unit_key(input, unit))
+        if res is None:
+            return False
+        for identity, h in res['deps'].items():
+            if self._identity_hashes.get(identity) != h:
+                return False
+        if stage == 'sem' and unit not in self._analyses:
+            # The messages of libghdl when the unit was analyzed (unless
+            # it has already been analyzed for a rule).
+            self._libghdl_write(res.get('analysis', ''))
+        for msg in res[stage]:
+            self.error(msg)
+        return True
+
+    def _check_syntax(self, input):
+        """Execute the syntax rules on input (which has been parsed)."""
+        if self._syntax_walker is not None:
+            # Walk once for all the visitor rules; their diagnostics are
+            # reported by their check method.
+            self._syntax_walker.walk(input, input.ast)
+        for r in self._syntax_rules:
+            r.check(input, input.ast)
+        if self._syntax_node_rules:
+            loc = Location(input.filename)
+            for n in thinutils.nodes_iter(input.ast):
+                k = iirs.Get_Kind(n)
+                rules = self._syntax_table.get(k)
+                if rules is None:
+                    rules = self._node_rules(
+                        self._syntax_table, self._syntax_node_rules, k)
+                for r in rules:
+                    r.check(loc, n)
+
+    def _check_sem(self, input, unit):
+        """Execute the semantic rules on unit (from input), which has been
+           analyzed."""
+        for r in self._sem_rules:
+            r.check(input, unit)
+        if not self._sem_node_rules:
+            return
+        for n in thinutils.nodes_iter(unit):
+            k = iirs.Get_Kind(n)
+            rules = self._sem_table.get(k)
+            if rules is None:
+                rules = self._node_rules(
+                    self._sem_table, self._sem_node_rules, k)
+            for r in rules:
+                r.check(input, n)
+
+    def _check_synth(self, input, unit):
+        """Execute the synthesis rules on unit (from input)."""
+        for r in self._synth_rules:
+            r.check(input, unit)
+
+
+def execute_and_report(rules, files):
+    # Do the checks (the libraries are initialized if needed)
     rules.execute(files)
 
+    profiler = rules.get_profiler()
+    if profiler is not None:
+        profiler.report(sys.stdout, STAGES, PHASES)
+        if profiler.json_file is not None:
+            profiler.save(profiler.json_file)
+
     # Final report
     nbr_files = rules.get_nbr_files()
     print('{0} file{1} checked'.format(
@@ -235,28 +998,172 @@ def execute_and_report(rules, files):
         sys.exit(1)
 
 
+def usage_options():
+    """Display the options handled by parse_option."""
+    print(' --jobs N      check files using N processes (0: one per cpu)')
+    print(' --no-cache    do not use the cache of results')
+    print(' --cache-dir=DIR  directory of the cache of results')
+    print(' --imports-on-demand  only read the --import files used')
+    print(' --index=FILE  import the files of FILE (see the index command)')
+    print(' --profile     display the time spent in each rule')
+    print(' --profile-json=FILE  also write the profile in JSON to FILE')
+    print(' --server[=SOCKET]  run as a daemon (see vhdllint-client)')
+    print(' --watch       check the files again when they are modified')
+    print(' --lsp [FILES]  run as a language server (FILES are imported)')
+
+
+def parse_option(rules, argv, i):
+    """Handle the execution option argv[i] for rules.
+       Return the number of arguments used (0 if argv[i] is not an execution
+       option)."""
+    arg = argv[i]
+    if arg == '--no-cache':
+        rules.set_cache(None)
+        return 1
+    elif arg.startswith('--cache-dir='):
+        rules.set_cache(cache.ResultCache(arg[12:]))
+        return 1
+    elif arg == '--imports-on-demand':
+        rules.set_imports_on_demand(True)
+        return 1
+    elif arg.startswith('--index='):
+        index = unitindex.UnitIndex(arg[8:])
+        index.load()
+        libs = index.get_libraries().difference(unitindex.LIBRARIES)
+        if libs:
+            fatal("index {0}: library {1} is not supported".format(
+                arg[8:], ', '.join(sorted(libs))))
+        rules.set_index(index)
+        return 1
+    elif arg == '--profile' or arg.startswith('--profile-json='):
+        profiler = rules.get_profiler()
+        if profiler is None:
+            profiler = Profiler()
+            rules.set_profiler(profiler)
+        if arg != '--profile':
+            profiler.json_file = arg[15:]
+        return 1
+    elif arg in ['-j', '--jobs']:
+        if i + 1 >= len(argv):
+            fatal("missing value for option {0}".format(arg))
+        val = argv[i + 1]
+        res = 2
+    elif arg.startswith('--jobs='):
+        val = arg[7:]
+        res = 1
+    elif arg.startswith('-j'):
+        val = arg[2:]
+        res = 1
+    else:
+        return 0
+    try:
+        jobs = int(val)
+    except ValueError:
+        fatal("incorrect number of jobs '{0}'".format(val))
+    if jobs < 0:
+        fatal("incorrect number of jobs '{0}'".format(val))
+    rules.set_jobs(jobs)
+    return res
+
+
+def _check_reload(mode):
+    """Exit if the files cannot be read again by libghdl (they would be
+       checked with their old content), as needed by mode."""
+    if not can_discard_file_buffer():
+        fatal('{0} needs a libghdl which exports '
+              'files_map__discard_source_file'.format(mode))
+
+
+def serve(rules, path):
+    """Run the daemon for rules on socket path (None for the default)."""
+    # Imported here, as it is only needed by the daemon.
+    import vhdllint.server as server
+    _check_reload('the daemon')
+    thin.analyze_init()
+    server.Server(rules, path).serve()
+    sys.exit(0)
+
+
+def watch(rules, files):
+    """Check files with rules, and check them again when modified."""
+    # Imported here, as it is only needed in watch mode.
+    import vhdllint.watch
+    _check_reload('--watch')
+    thin.analyze_init()
+    try:
+        vhdllint.watch.WatchExec(rules).watch(files)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+def lsp(rules, imports):
+    """Run the language server for rules."""
+    # Imported here, as it is only needed by the language server.
+    import vhdllint.lsp
+    _check_reload('the language server')
+    thin.analyze_init()
+    vhdllint.lsp.main(rules, imports)
+    sys.exit(0)
+
+
 def main(argv, rules):
+    if len(argv) > 1 and argv[1] == 'index':
+        unitindex.main(argv[2:])
+    rules.set_cache(cache.ResultCache(cache.default_cache_dir()))
+    watching = False
+    server = None
+    lsp_imports = None
     optind = 0
-    for i in range(1, len(argv)):
+    i = 1
+    while i < len(argv):
         arg = argv[i]
         if arg[0] != '-':
             optind = i
             break
         if arg in ['-h', '--help']:
-            print("usage: {} files...".format(argv[0]))
+            print("usage: {} [OPTIONS] files...".format(argv[0]))
+            print("   or: {} index [--help] ...".format(argv[0]))
+            print('Options are:')
+            usage_options()
             sys.exit(0)
         elif arg in ['--import', '--synth', '--tb', '--top']:
             optind = i
             break
-        elif thin.set_option(arg) != 0:
+        elif arg == '--server' or arg.startswith('--server='):
+            server = arg[9:] or True
+            i += 1
+            continue
+        elif arg == '--watch':
+            watching = True
+            i += 1
+            continue
+        elif arg == '--lsp':
+            # The next arguments are the imported files.
+            lsp_imports = argv[i + 1:]
+            break
+        n = parse_option(rules, argv, i)
+        if n != 0:
+            i += n
+            continue
+        if rules.set_option(arg) != 0:
             print('unknown option {0}'.format(arg))
             print('try: {0} --help'.format(sys.argv[0]))
             sys.exit(2)
+        i += 1
+
+    # The other options apply to these modes, so they are handled once all
+    # the options have been parsed.
+    if server is not None:
+        serve(rules, None if server is True else server)
+    if lsp_imports is not None:
+        lsp(rules, lsp_imports)
 
     if optind == 0:
         print('no input file')
         sys.exit(2)
 
+    if watching:
+        watch(rules, argv[optind:])
     execute_and_report(rules, argv[optind:])
 
 
@@ -266,17 +1173,22 @@ class TestRun(RulesExec):
         print('  test: {0}'.format(comment))
         if isinstance(files, str):
             files = [files]
+        # The --std= options set the standard for this test only.
+        std = thin.Flags.Vhdl_Std.value
+        for f in files:
+            if f.startswith('--std='):
+                self.set_option(f)
         basedir = os.path.join(os.path.dirname(__file__), 'testfiles')
         files = map(lambda f: f if f.startswith('--') else
-                    os.path.join(basedir, f), files)
-        # Be sure the work library is empty.  This is brut force.
-        work = thin.Work_Library.value
-        if work != thin.Null_Iir:
-            for f in thinutils.chain_iter(iirs.Get_Design_File_Chain(work)):
-                thin.Purge_Design_File(f)
-            iirs.Set_Design_File_Chain(work, thin.Null_Iir)
+                    os.path.join(basedir, f), [f for f in files
+                                               if not f.startswith('--std=')])
+        # Be sure the work library is empty.
+        self.reset_work_library()
         self.add(rule)
-        self.execute(files)
+        try:
+            self.execute(files)
+        finally:
+            thin.Flags.Vhdl_Std.value = std
         if not self.is_ok():
             ruleexec._nbr_errors += 1
             sys.stderr.write("ERROR: {0}: test failed\n".format(rule.rulename))
@@ -291,5 +1203,179 @@ class TestRunOK(TestRun):
 
 
 class TestRunFail(TestRun):
+    def __init__(self, ruleexec, comment, rule, files, nbr_errors=None):
+        # If not None, the exact number of errors expected.
+        self._expected = nbr_errors
+        super(TestRunFail, self).__init__(ruleexec, comment, rule, files)
+
     def is_ok(self):
+        if self._expected is not None:
+            return self.get_nbr_errors() == self._expected
         return self.get_nbr_errors() != 0
+
+
+def test_failed(runner, name, msg):
+    """Report a failure of the testsuite of module name."""
+    runner._nbr_errors += 1
+    sys.stderr.write("ERROR: {0}: {1}\n".format(name, msg))
+
+
+def test(runner):
+    """Testsuite of the executor (runner is the executor of the
+       testsuite)."""
+    from vhdllint.filerules.check_no_trailing_spaces import \
+        CheckNoTrailingSpaces
+    from vhdllint.semrules.check_unused import CheckUnused
+    from vhdllint.utils import Location_To_File_Line_Col
+    basedir = os.path.join(os.path.dirname(__file__), 'testfiles')
+    files = [os.path.join(basedir, f) for f in [
+        'trailingspace.vhdl', 'unused1.vhdl', 'hello.vhdl', 'unused3.vhdl']]
+
+    def run(jobs, result_cache):
+        """Return the diagnostics and the number of calls to the rules."""
+        exe = RulesExec(quiet=True)
+        exe.set_cache(result_cache)
+        exe.set_jobs(jobs)
+        calls = []
+        for r in [CheckNoTrailingSpaces(), CheckUnused()]:
+            exe.add(r)
+
+            def check(*args, **kwargs):
+                calls.append(None)
+                return check.orig(*args, **kwargs)
+            check.orig = r.check
+            r.check = check
+        messages = []
+        exe.set_output(messages.append)
+        exe.reset_work_library()
+        exe.execute(files)
+        return messages, len(calls)
+
+    class CheckLocations(SyntaxRule):
+        """Compare the lines and columns of the locations of the nodes and
+           of the tokens (computed in Python) with those of libghdl."""
+
+        rulename = 'Locations'
+
+        def __init__(self):
+            super(CheckLocations, self).__init__(None)
+
+        def compare(self, input, loc, found):
+            fe = input.fe
+            line = thin.Location_File_To_Line(loc, fe)
+            col = thin.Location_File_Line_To_Col(loc, fe, line)
+            if found != (fe, line, col):
+                self.error(Location(input.filename, line, col),
+                           'resolved as {0}:{1}'.format(found[1], found[2]))
+
+        def check(self, input, ast):
+            first = None
+            for n in thinutils.nodes_iter(ast):
+                loc = iirs.Get_Location(n)
+                if loc == thin.No_Location:
+                    continue
+                first = loc - thin.Location_File_To_Pos(loc, input.fe)
+                self.compare(input, loc, Location_To_File_Line_Col(loc))
+            stream = TokenStream.scan(input.fe)
+            # The Eof token is after the last line.
+            for i in range(len(stream) - 1):
+                tok = stream.get_location(input.filename, i)
+                self.compare(input, first + tok.start,
+                             (input.fe, tok.line, tok.col))
+
+    # Tabs (one at column 8), then also CRLF line terminators and a last
+    # line without terminator.
+    TestRunOK(runner, "locations resolved like libghdl",
+              CheckLocations(), "locations1.vhdl")
+    TestRunOK(runner, "locations resolved like libghdl with CRLF",
+              CheckLocations(), "locations2.vhdl")
+
+    print('  test: same diagnostics with --jobs')
+    serial, _ = run(1, None)
+    parallel, _ = run(2, None)
+    if not serial or parallel != serial:
+        test_failed(runner, 'rulesexec',
+                    'diagnostics with --jobs=2: {0} instead of {1}'.format(
+                        parallel, serial))
+
+    print('  test: diagnostics replayed from the cache')
+    tmpdir = tempfile.mkdtemp(prefix='vhdllint-test-')
+    try:
+        result_cache = cache.ResultCache(tmpdir)
+        first, _ = run(1, result_cache)
+        second, calls = run(1, result_cache)
+        if first != serial or second != first or calls != 0:
+            test_failed(runner, 'rulesexec',
+                        'diagnostics replayed: {0} ({1} checks) instead of '
+                        '{2}'.format(second, calls, first))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print('  test: results invalidated by a change of an architecture')
+    # Port q of the entity is only used by the second version of its
+    # architecture (in another file, so that it is read again).
+    tmpdir = tempfile.mkdtemp(prefix='vhdllint-test-')
+    try:
+        result_cache = cache.ResultCache(os.path.join(tmpdir, 'cache'))
+        ent = os.path.join(tmpdir, 'ent.vhdl')
+        with open(ent, 'w') as f:
+            f.write('entity ent is\n'
+                    '  port (p : in bit; q : in bit);\n'
+                    'end ent;\n')
+        results = []
+        for n, expr in [(1, "p = '0'"), (2, 'p = q')]:
+            arch = os.path.join(tmpdir, 'arch{0}.vhdl'.format(n))
+            with open(arch, 'w') as f:
+                f.write('architecture behav of ent is\n'
+                        'begin\n'
+                        '  assert {0};\n'
+                        'end behav;\n'.format(expr))
+            exe = RulesExec(quiet=True)
+            exe.set_cache(result_cache)
+            exe.add(CheckUnused())
+            messages = []
+            exe.set_output(messages.append)
+            exe.reset_work_library()
+            exe.execute([ent, arch])
+            results.append(messages)
+        if len(results[0]) != 1 or results[1]:
+            test_failed(runner, 'rulesexec',
+                        'diagnostics after a change of the architecture: '
+                        '{0} then {1}'.format(results[0], results[1]))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print('  test: same diagnostics with the library of the imports')
+    # Port q is unused, port p is used by the architecture of an imported
+    # file.  The second time, the architecture is in the library of the
+    # imports (and not parsed) but the entity is checked again.
+    tmpdir = tempfile.mkdtemp(prefix='vhdllint-test-')
+    try:
+        ent = os.path.join(tmpdir, 'ent.vhdl')
+        arch = os.path.join(tmpdir, 'arch.vhdl')
+        with open(arch, 'w') as f:
+            f.write('architecture behav of ent is\n'
+                    '  signal s : bit;\n'
+                    'begin\n'
+                    '  s <= p;\n'
+                    'end behav;\n')
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'vhdllint')
+        outputs = []
+        for comment in ['', '-- Changed.\n']:
+            with open(ent, 'w') as f:
+                f.write('entity ent is\n'
+                        '  port (p : in bit; q : in bit);\n'
+                        'end ent;\n' + comment)
+            proc = subprocess.Popen(
+                [sys.executable, script,
+                 '--cache-dir=' + os.path.join(tmpdir, 'cache'),
+                 '--rule=Unused', ent, '--import', arch],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            outputs.append(proc.communicate()[1])
+        if b'q is not used' not in outputs[0] or outputs[1] != outputs[0]:
+            test_failed(runner, 'rulesexec',
+                        'diagnostics with the library of the imports: {0} '
+                        'instead of {1}'.format(outputs[1], outputs[0]))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
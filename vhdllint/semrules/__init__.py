@@ -7,15 +7,36 @@ from vhdllint.rule import Rule
 
 
 class SemRule(Rule):
+    # True if the diagnostics of the rule on an entity depend on its
+    # architectures.  The architectures are then part of the key of the
+    # entity in the cache.
+    uses_architectures = False
+
+    # Kinds (iirs.Iir_Kind) of the constructs that the rule gets from the
+    # mirror (RuleInput.mirror).  Only the constructs of the kinds of the
+    # rules are mirrored.
+    mirror_kinds = ()
+
     def __init__(self, rulename):
         super(SemRule, self).__init__(rulename)
 
+    def reset(self):
+        """Called before the semantic checks of an execution.  Rules which
+           keep results across units must clear them (the nodes of a
+           previous execution may have been freed)."""
+        pass
+
     def check(self, loc, dsgn):
         """The check to be performed on an AST (a design unit)."""
         assert False  # Must be redefined
 
 
 class SemNodeRule(Rule):
+    # List of kinds (iirs.Iir_Kind) of the nodes handled by the rule, or
+    # None for all the nodes.  The check method is only called for nodes of
+    # these kinds.
+    kinds = None
+
     def __init__(self, rulename):
         super(SemNodeRule, self).__init__(rulename)
 
@@ -14,6 +14,7 @@ class CheckAssocs(SemRule):
        name in the same order as the interfaces."""
 
     rulename = 'Assocs'
+    mirror_kinds = [iirs.Iir_Kind.Component_Instantiation_Statement]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -48,17 +49,15 @@ class CheckAssocs(SemRule):
                 inter = iirs.Get_Chain(inter)
 
     def check(self, input, ast):
-        for n in thinutils.concurrent_stmts_iter(ast):
-            if iirs.Get_Kind(n) \
-               == iirs.Iir_Kind.Component_Instantiation_Statement:
-                comp = thin.Iirs_Utils.Get_Entity_From_Entity_Aspect(
-                    iirs.Get_Instantiated_Unit(n))
-                self.check_assocs(
-                    n, iirs.Get_Generic_Chain(comp),
-                    iirs.Get_Generic_Map_Aspect_Chain(n))
-                self.check_assocs(
-                    n, iirs.Get_Port_Chain(comp),
-                    iirs.Get_Port_Map_Aspect_Chain(n))
+        for n in input.mirror.nodes_of_kind(self.mirror_kinds, ast):
+            comp = thin.Iirs_Utils.Get_Entity_From_Entity_Aspect(
+                iirs.Get_Instantiated_Unit(n))
+            self.check_assocs(
+                n, iirs.Get_Generic_Chain(comp),
+                iirs.Get_Generic_Map_Aspect_Chain(n))
+            self.check_assocs(
+                n, iirs.Get_Port_Chain(comp),
+                iirs.Get_Port_Map_Aspect_Chain(n))
 
     @staticmethod
     def test(runner):
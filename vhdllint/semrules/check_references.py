@@ -18,6 +18,11 @@ class CheckReferences(SemNodeRule):
     TODO: end names, operators."""
 
     rulename = 'References'
+    kinds = [iirs.Iir_Kind.Simple_Name,
+             iirs.Iir_Kind.Selected_Name,
+             iirs.Iir_Kind.Selected_Element,
+             iirs.Iir_Kind.Library_Clause,
+             iirs.Iir_Kind.Attribute_Name]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -1,12 +1,55 @@
 from vhdllint.semrules import SemRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 from vhdllint.utils import Location
+import os
 import libghdl.thin as thin
 import libghdl.thinutils as thinutils
 import libghdl.iirs as iirs
 import libghdl.std_names as std_names
 import vhdllint.nodeutils as nodeutils
 
+# Identifiers declared by the standard and ieee packages (as frozensets of
+# name ids), indexed by (standard, libghdl version, libghdl options, file
+# of the package, package).  They are fixed, so they are gathered once per
+# process and saved in the cache of the executor (if any, and if the
+# version of libghdl is known).
+_tables = {}
+_version = None
+
+
+def _get_libghdl_version():
+    """Return a string which identifies the version of libghdl, or '' if
+       unknown."""
+    global _version
+    if _version is None:
+        try:
+            from libghdl.version import __version__
+            _version = __version__
+        except ImportError:
+            # Older libghdl: identify the library by its file.
+            path = getattr(getattr(thin, 'libghdl', None), '_name', '')
+            try:
+                st = os.stat(path)
+                _version = '{0}:{1}:{2}'.format(
+                    path, st.st_size, st.st_mtime)
+            except OSError:
+                _version = ''
+    return _version
+
+
+def _get_package_file(pkg):
+    """Return the directory and the name of the file of package pkg (which
+       depend on the ieee flavor and the library path)."""
+    f = iirs.Get_Design_File(iirs.Get_Design_Unit(pkg))
+    res = []
+    for ident in [iirs.Get_Design_File_Directory(f),
+                  iirs.Get_Design_File_Filename(f)]:
+        name = thin.Get_Name_Ptr(ident) if ident else ''
+        if not isinstance(name, str):
+            name = name.decode('utf-8')
+        res.append(name)
+    return tuple(res)
+
 
 class CheckStdHidding(SemRule):
     """Check that standard names (from std.standard or any ieee package)
@@ -22,7 +65,7 @@ class CheckStdHidding(SemRule):
         super(self.__class__, self).__init__(name)
         self._standard_ids = None
         self._ieee_ids = set()
-        self._ieee_pkgs = []
+        self._ieee_pkgs = set()     # Names of the packages in _ieee_ids
 
     def add_identifier(self, dct, decl):
         id = iirs.Get_Identifier(decl)
@@ -60,19 +103,46 @@ class CheckStdHidding(SemRule):
                         self.add_identifier(res, un)
         return res
 
+    def get_identifiers(self, pkg, name):
+        """Return the identifiers declared by package pkg (whose full name
+           is name, like 'ieee.numeric_std'), as a frozenset."""
+        version = _get_libghdl_version()
+        key = (thin.Flags.Vhdl_Std.value, version,
+               tuple(self._run.get_options()), _get_package_file(pkg), name)
+        res = _tables.get(key)
+        if res is not None:
+            return res
+        # The identifiers are not saved if libghdl cannot be identified.
+        cache = self._run.get_cache() if version else None
+        names = None
+        if cache is not None:
+            cache_key = cache.key('std-names', key)
+            names = cache.get(cache_key)
+        if names is not None:
+            res = frozenset([thin.Get_Identifier(n.encode('latin-1'))
+                             for n in names])
+        else:
+            res = frozenset(self.gather_identifiers(pkg))
+            if cache is not None:
+                cache.put(cache_key,
+                          sorted([nodeutils.get_name_str(i) for i in res]))
+        _tables[key] = res
+        return res
+
     def check(self, input, dsgn):
         if self._standard_ids is None:
-            self._standard_ids = self.gather_identifiers(
-                thin.Standard_Package.value)
+            self._standard_ids = self.get_identifiers(
+                thin.Standard_Package.value, 'std.standard')
         pkgs = nodeutils.extract_packages_from_context_clause(dsgn)
         for pkg in pkgs:
             lib = iirs.Get_Library(
                 iirs.Get_Design_File(iirs.Get_Design_Unit(pkg)))
-            if iirs.Get_Identifier(lib) == std_names.Name.Ieee \
-               and pkg not in self._ieee_pkgs:
-                self._ieee_pkgs.append(pkg)
-                self._ieee_ids = self._ieee_ids.union(
-                    self.gather_identifiers(pkg))
+            if iirs.Get_Identifier(lib) != std_names.Name.Ieee:
+                continue
+            name = 'ieee.' + nodeutils.get_name_str(iirs.Get_Identifier(pkg))
+            if name not in self._ieee_pkgs:
+                self._ieee_pkgs.add(name)
+                self._ieee_ids.update(self.get_identifiers(pkg, name))
         lu = iirs.Get_Library_Unit(dsgn)
         for d in thinutils.declarations_iter(lu):
             id = iirs.Get_Identifier(d)
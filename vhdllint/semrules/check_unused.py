@@ -10,13 +10,25 @@ import libghdl.iirs as iirs
 class CheckUnused(SemRule):
     """Report unused declarations in architectures and package bodies.
 
-       One character loop iterators (like 'for i in ...') are not reported."""
+       One character loop iterators (like 'for i in ...') are not reported.
+
+       The declarations of an entity are reported (once) with the entity,
+       if they are not used by the entity nor by any of its architectures.
+       The uses of an entity and its architectures are gathered once per
+       entity."""
 
     rulename = 'Unused'
+    uses_architectures = True
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
         self._handlers = {}
+        # Declarations used by each entity and its architectures, indexed
+        # by entity.
+        self._entities = {}
+
+    def reset(self):
+        self._entities = {}
 
     def mark_used(self, n):
         self._used.add(n)
@@ -30,6 +42,24 @@ class CheckUnused(SemRule):
             elif k == iirs.Iir_Kind.Selected_Element:
                 self.mark_used(iirs.Get_Selected_Element(n))
 
+    def entity_used(self, ent):
+        """Return the set of declarations used by entity ent and all its
+           architectures, or None if it has no architecture or if one of
+           them cannot be analyzed."""
+        if ent in self._entities:
+            return self._entities[ent]
+        archs = self._run.get_architectures(ent)
+        self._used = set()
+        self.mark(ent)
+        for unit in archs:
+            if not self._run.analyze_unit(unit):
+                archs = []
+                break
+            self.mark(iirs.Get_Library_Unit(unit))
+        res = self._used if archs else None
+        self._entities[ent] = res
+        return res
+
     def is_second_subprogram(self, decl):
         return iirs.Get_Kind(decl) in iirs.Iir_Kinds.Subprogram_Declaration \
             and thin.Iirs_Utils.Is_Second_Subprogram_Specification(decl)
@@ -72,12 +102,20 @@ class CheckUnused(SemRule):
     def check(self, input, unit):
         libunit = iirs.Get_Library_Unit(unit)
         k = iirs.Get_Kind(libunit)
-        if k == iirs.Iir_Kind.Architecture_Body:
-            self._used = set()
-            ent = thin.Iirs_Utils.Get_Entity(libunit)
-            self.mark(ent)
-            self.mark(libunit)
-            self.report_unused(ent)
+        if k == iirs.Iir_Kind.Entity_Declaration:
+            used = self.entity_used(libunit)
+            if used is not None:
+                self._used = used
+                self.report_unused(libunit)
+        elif k == iirs.Iir_Kind.Architecture_Body:
+            used = self.entity_used(thin.Iirs_Utils.Get_Entity(libunit))
+            if used is None:
+                # The declarations of an architecture are only visible
+                # within it.
+                self._used = set()
+                self.mark(libunit)
+            else:
+                self._used = used
             self.report_unused(libunit)
         elif k == iirs.Iir_Kind.Package_Body:
             self._used = set()
@@ -97,3 +135,11 @@ class CheckUnused(SemRule):
                     rule, "unused3.vhdl")
         TestRunOK(runner, "Used function with a specification",
                   rule, "unused4.vhdl")
+        TestRunOK(runner, "Port used by another architecture",
+                  rule, "unused5.vhdl")
+        TestRunFail(runner, "Port unused by two architectures",
+                    rule, "unused6.vhdl", nbr_errors=1)
+        TestRunFail(runner, "Unused signal after a tab",
+                    rule, "locations1.vhdl", nbr_errors=1)
+        TestRunFail(runner, "Unused signal after a tab, with CRLF",
+                    rule, "locations2.vhdl", nbr_errors=1)
@@ -0,0 +1,104 @@
+"""Lint daemon.
+
+   The daemon keeps libghdl initialized (the std and ieee libraries stay
+   loaded) and the rules created, so that a request only pays for the
+   checks.  Between requests, only the work library is emptied.
+
+   Requests and answers are JSON objects, one per line, on a Unix socket:
+     request: {"args": [files and properties], "cwd": directory}
+              {"shutdown": true}
+     answers: {"diagnostic": message} for each diagnostic, as they are
+              found, and {"messages": text} for the messages of libghdl
+              (like errors found when parsing or analyzing the files),
+              then {"files": nbr, "errors": nbr, "status": status}
+              (status is 2 for a fatal error, 3 for an internal error)
+              {"shutdown": true}
+   Requests are handled one after the other."""
+
+import json
+import os
+import socket
+import sys
+import traceback
+from vhdllint.client import default_socket_path
+
+
+class Server(object):
+    def __init__(self, rules, path=None):
+        self._rules = rules
+        self._path = path or default_socket_path()
+
+    def serve(self):
+        """Handle requests until a shutdown request."""
+        if os.path.exists(self._path):
+            os.unlink(self._path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self._path)
+            sock.listen(5)
+            print('vhdllint daemon listening on {0}'.format(self._path))
+            sys.stdout.flush()
+            running = True
+            while running:
+                conn, _ = sock.accept()
+                try:
+                    running = self.handle(conn)
+                finally:
+                    conn.close()
+        finally:
+            sock.close()
+            os.unlink(self._path)
+
+    def handle(self, conn):
+        """Handle the request on connection conn.  Return False to stop."""
+        f = conn.makefile('rb')
+        line = f.readline()
+        f.close()
+        state = {'open': True}
+
+        def send(ans):
+            if not state['open']:
+                return
+            try:
+                conn.sendall(json.dumps(ans).encode('utf-8') + b'\n')
+            except socket.error:
+                # The client has gone, finish quietly.
+                state['open'] = False
+
+        try:
+            req = json.loads(line.decode('utf-8'))
+        except ValueError:
+            send({'files': 0, 'errors': 0, 'status': 3})
+            return True
+        if req.get('shutdown'):
+            send({'shutdown': True})
+            return False
+        cwd = req.get('cwd', '.')
+        files = [a if a.startswith('--') else os.path.join(cwd, a)
+                 for a in req.get('args', [])]
+        send(self.check(files, lambda msg: send({'diagnostic': msg}),
+                        lambda msgs: send({'messages': msgs})))
+        return True
+
+    def check(self, files, output, libghdl_output):
+        """Check files, call output for each diagnostic and libghdl_output
+           for the messages of libghdl, and return the final answer."""
+        rules = self._rules
+        rules.reset()
+        rules.set_output(output)
+        rules.set_libghdl_output(libghdl_output)
+        try:
+            rules.execute(files)
+            status = 0 if rules.get_nbr_errors() == 0 else 1
+        except SystemExit as e:
+            # Fatal error (like a file not found).
+            status = e.code if isinstance(e.code, int) else 2
+        except Exception:
+            traceback.print_exc()
+            status = 3
+        finally:
+            rules.set_output(None)
+            rules.set_libghdl_output(None)
+        return {'files': rules.get_nbr_files(),
+                'errors': rules.get_nbr_errors(),
+                'status': status}
@@ -3,9 +3,20 @@
    are called for each file, with the unanalyzed AST.
 
    Syntactic rules include indentations, naming conventions for some
-   identifiers..."""
+   identifiers...
+
+   The design file is walked only once for all the SyntaxVisitorRules (see
+   SyntaxWalker), instead of once per rule.  The other rules still walk
+   the design file themselves: the indentation rules (BasicIndent and
+   Indent), whose checks depend on the chain being walked and on the
+   construct which owns it, and the rules which only look at the library
+   units or the context clauses of the design units (like EntityItems and
+   IeeePackages)."""
 
 from vhdllint.rule import Rule
+import libghdl.iirs as iirs
+import libghdl.thin as thin
+import libghdl.thinutils as thinutils
 
 
 class SyntaxRule(Rule):
@@ -18,9 +29,186 @@ class SyntaxRule(Rule):
 
 
 class SyntaxNodeRule(Rule):
+    # List of kinds (iirs.Iir_Kind) of the nodes handled by the rule, or
+    # None for all the nodes.  The check method is only called for nodes of
+    # these kinds.
+    kinds = None
+
     def __init__(self, rulename):
         super(SyntaxNodeRule, self).__init__(rulename)
 
     def check(self, input, node):
         """The check to be performed on each node."""
         assert False  # Must be redefined
+
+
+class SyntaxVisitorRule(SyntaxRule):
+    """Rule whose callbacks are called during the walk of the design file.
+       For a node of kind K, the method enter_K(node, ctxt) is called before
+       the walk of the nodes within it, and leave_K(node, ctxt) after, where
+       K is the name of the kind in lower case (like
+       enter_process_statement for Iir_Kind.Process_Statement).  ctxt is a
+       SyntaxContext."""
+
+    def __init__(self, rulename):
+        super(SyntaxVisitorRule, self).__init__(rulename)
+        # Diagnostics found during the walk.  They are reported by check, so
+        # that the diagnostics are still displayed rule after rule.
+        self._pending = None
+        self._walked = None
+
+    def error(self, loc, msg):
+        if self._pending is not None:
+            self._pending.append((loc, msg))
+        else:
+            super(SyntaxVisitorRule, self).error(loc, msg)
+
+    def check(self, input, ast):
+        """Report the diagnostics found during the walk of ast (which is
+           walked for this rule only if not already done)."""
+        if self._walked != ast:
+            SyntaxWalker([self]).walk(input, ast)
+        pending = self._pending
+        self._pending = None
+        self._walked = None
+        for loc, msg in pending:
+            self.error(loc, msg)
+
+
+def _kind_names():
+    """Return the names (in lower case) of the kinds, indexed by kind."""
+    return dict([(v, k.lower()) for k, v in vars(iirs.Iir_Kind).items()
+                 if not k.startswith('_') and isinstance(v, int)])
+
+
+class SyntaxContext(object):
+    """Position in the walk of a design file."""
+
+    def __init__(self, input):
+        self.input = input
+        # Enclosing nodes of the current node (the outermost first).
+        self.parents = []
+        # Nesting level of the current node: 0 for the design units (and
+        # their context clauses and library unit), incremented for the
+        # declarations and statements within a construct (like an
+        # indentation level).
+        self.level = 0
+
+    def get_parent(self):
+        """Return the node which encloses the current node."""
+        return self.parents[-1] if self.parents else thin.Null_Iir
+
+
+class SyntaxWalker(object):
+    """Depth-first walk of the constructs of a design file: design units,
+       context clauses, library units, declarations, statements, clauses of
+       if statements, alternatives of case statements and case generate
+       statements and generate bodies.  Expressions and names are not
+       walked."""
+
+    def __init__(self, rules):
+        """Call the callbacks of rules (a list of SyntaxVisitorRule)."""
+        self._rules = rules
+        self._enter = {}
+        self._leave = {}
+        self._choices = set()
+        for k, name in _kind_names().items():
+            if name.startswith('choice_by_'):
+                self._choices.add(k)
+            enter = [getattr(r, 'enter_' + name) for r in rules
+                     if hasattr(r, 'enter_' + name)]
+            if enter:
+                self._enter[k] = enter
+            leave = [getattr(r, 'leave_' + name) for r in rules
+                     if hasattr(r, 'leave_' + name)]
+            if leave:
+                self._leave[k] = leave
+        kind = iirs.Iir_Kind
+        # Constructs with declarations, concurrent statements or
+        # sequential statements.
+        self._decls = frozenset([
+            kind.Entity_Declaration, kind.Architecture_Body,
+            kind.Package_Declaration, kind.Package_Body,
+            kind.Configuration_Declaration, kind.Block_Statement,
+            kind.Generate_Statement_Body, kind.Process_Statement,
+            kind.Sensitized_Process_Statement, kind.Function_Body,
+            kind.Procedure_Body, kind.Protected_Type_Body])
+        self._concs = frozenset([
+            kind.Entity_Declaration, kind.Architecture_Body,
+            kind.Block_Statement, kind.Generate_Statement_Body])
+        self._seqs = frozenset([
+            kind.Process_Statement, kind.Sensitized_Process_Statement,
+            kind.Function_Body, kind.Procedure_Body,
+            kind.If_Statement, kind.Elsif,
+            kind.For_Loop_Statement, kind.While_Loop_Statement])
+
+    def walk(self, input, ast):
+        """Walk ast (a design file) of input."""
+        for r in self._rules:
+            r._pending = []
+            r._walked = ast
+        self._node(ast, SyntaxContext(input))
+
+    def _chain(self, first, ctxt, level):
+        """Walk the chain of nodes first at nesting level level."""
+        saved = ctxt.level
+        ctxt.level = level
+        for n in thinutils.chain_iter(first):
+            self._node(n, ctxt)
+        ctxt.level = saved
+
+    def _node(self, n, ctxt):
+        k = iirs.Get_Kind(n)
+        for cb in self._enter.get(k, ()):
+            cb(n, ctxt)
+        ctxt.parents.append(n)
+        self._children(n, k, ctxt)
+        ctxt.parents.pop()
+        for cb in self._leave.get(k, ()):
+            cb(n, ctxt)
+
+    def _children(self, n, k, ctxt):
+        kind = iirs.Iir_Kind
+        level = ctxt.level
+        if k == kind.Design_File:
+            self._chain(iirs.Get_First_Design_Unit(n), ctxt, level)
+            return
+        elif k == kind.Design_Unit:
+            self._chain(iirs.Get_Context_Items(n), ctxt, level)
+            self._node(iirs.Get_Library_Unit(n), ctxt)
+            return
+        if k in self._decls:
+            self._chain(iirs.Get_Declaration_Chain(n), ctxt, level + 1)
+        if k in self._concs:
+            self._chain(iirs.Get_Concurrent_Statement_Chain(n), ctxt,
+                        level + 1)
+        elif k in self._seqs:
+            self._chain(iirs.Get_Sequential_Statement_Chain(n), ctxt,
+                        level + 1)
+        if k == kind.If_Statement or k == kind.Elsif:
+            clause = iirs.Get_Else_Clause(n)
+            if clause != thin.Null_Iir:
+                self._node(clause, ctxt)
+        elif k == kind.Case_Statement \
+                or k == kind.Case_Generate_Statement:
+            self._chain(iirs.Get_Case_Statement_Alternative_Chain(n), ctxt,
+                        level + 1)
+        elif k in self._choices:
+            # An alternative of a case statement or of a case generate
+            # statement (the parent of n is ctxt.parents[-2], as n is the
+            # last one).
+            if iirs.Get_Same_Alternative_Flag(n):
+                pass
+            elif iirs.Get_Kind(ctxt.parents[-2]) \
+                    == kind.Case_Generate_Statement:
+                self._node(iirs.Get_Associated_Block(n), ctxt)
+            else:
+                self._chain(iirs.Get_Associated_Chain(n), ctxt, level + 1)
+        elif k == kind.For_Generate_Statement:
+            self._node(iirs.Get_Generate_Statement_Body(n), ctxt)
+        elif k == kind.If_Generate_Statement \
+                or k == kind.If_Generate_Else_Clause:
+            self._node(iirs.Get_Generate_Statement_Body(n), ctxt)
+            clause = iirs.Get_Generate_Else_Clause(n)
+            if clause != thin.Null_Iir:
+                self._node(clause, ctxt)
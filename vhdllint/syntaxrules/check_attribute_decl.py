@@ -10,6 +10,7 @@ class CheckAttributeDecl(SyntaxNodeRule):
     """Check no user attribute declarations."""
 
     rulename = 'NoUserAttributes'
+    kinds = [iirs.Iir_Kind.Attribute_Declaration]
 
     def __init__(self, name=None, allowed=[]):
         """Create the rule
@@ -14,6 +14,7 @@ class CheckAttributeName(SyntaxNodeRule):
     """
 
     rulename = 'NoUserAttrName'
+    kinds = [iirs.Iir_Kind.Attribute_Name]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -26,9 +26,7 @@ class CheckBasicIndent(SyntaxRule):
     def chk_level(self, n, loc, level):
         if loc == thin.No_Location:
             return
-        fe = thin.Location_To_File(loc)
-        line = thin.Location_File_To_Line(loc, fe)
-        col = thin.Location_File_Line_To_Col(loc, fe, line)
+        _, _, col = utils.Location_To_File_Line_Col(loc)
         if col != level:
             self.error(
                 utils.Location.from_location(loc),
@@ -1,13 +1,12 @@
-from vhdllint.syntaxrules import SyntaxRule
+from vhdllint.syntaxrules import SyntaxVisitorRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 from vhdllint.utils import Location, Location_To_File_Line_Col
 import libghdl.iirs as iirs
 import libghdl.thin as thin
-import libghdl.thinutils as thinutils
 import libghdl.elocations as elocations
 
 
-class CheckBeginEndLayout(SyntaxRule):
+class CheckBeginEndLayout(SyntaxVisitorRule):
     """Check each process has either a label or a preceeding comment."""
 
     rulename = 'BeginEndLayout'
@@ -15,36 +14,34 @@ class CheckBeginEndLayout(SyntaxRule):
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
 
-    def check(self, input, ast):
-        for node in thinutils.constructs_iter(ast):
-            k = iirs.Get_Kind(node)
-            if k not in [iirs.Iir_Kind.Architecture_Body,
-                         iirs.Iir_Kind.Block_Statement,
-                         iirs.Iir_Kind.Entity_Declaration,
-                         iirs.Iir_Kind.Generate_Statement_Body,
-                         iirs.Iir_Kind.Process_Statement,
-                         iirs.Iir_Kind.Sensitized_Process_Statement,
-                         iirs.Iir_Kind.Procedure_Body,
-                         iirs.Iir_Kind.Function_Body]:
-                continue
-            beg_loc = elocations.Get_Begin_Location(node)
-            end_loc = elocations.Get_End_Location(node)
-            if beg_loc == thin.No_Location or end_loc == thin.No_Location:
-                continue
-            beg_file, beg_line, beg_col = Location_To_File_Line_Col(beg_loc)
-            end_file, end_line, end_col = Location_To_File_Line_Col(end_loc)
-            if end_col != beg_col:
-                self.error(
-                    Location.from_location(end_loc),
-                    "'begin' and 'end' must be aligned on the same column")
-            if k in iirs.Iir_Kinds.Subprogram_Body:
-                if iirs.Get_Declaration_Chain(node) != thin.Null_Iir:
-                    is_loc = elocations.Get_Is_Location(node)
-                    is_file, is_ln, is_col = Location_To_File_Line_Col(is_loc)
-                    if is_col != beg_col:
-                        self.error(
-                            Location.from_location(is_loc),
-                            "'is' and 'begin' must be on the same column")
+    def enter_construct(self, node, ctxt):
+        beg_loc = elocations.Get_Begin_Location(node)
+        end_loc = elocations.Get_End_Location(node)
+        if beg_loc == thin.No_Location or end_loc == thin.No_Location:
+            return
+        beg_file, beg_line, beg_col = Location_To_File_Line_Col(beg_loc)
+        end_file, end_line, end_col = Location_To_File_Line_Col(end_loc)
+        if end_col != beg_col:
+            self.error(
+                Location.from_location(end_loc),
+                "'begin' and 'end' must be aligned on the same column")
+        if iirs.Get_Kind(node) in iirs.Iir_Kinds.Subprogram_Body:
+            if iirs.Get_Declaration_Chain(node) != thin.Null_Iir:
+                is_loc = elocations.Get_Is_Location(node)
+                is_file, is_ln, is_col = Location_To_File_Line_Col(is_loc)
+                if is_col != beg_col:
+                    self.error(
+                        Location.from_location(is_loc),
+                        "'is' and 'begin' must be on the same column")
+
+    enter_architecture_body = enter_construct
+    enter_block_statement = enter_construct
+    enter_entity_declaration = enter_construct
+    enter_generate_statement_body = enter_construct
+    enter_process_statement = enter_construct
+    enter_sensitized_process_statement = enter_construct
+    enter_procedure_body = enter_construct
+    enter_function_body = enter_construct
 
     @staticmethod
     def test(runner):
@@ -1,13 +1,12 @@
-from vhdllint.syntaxrules import SyntaxRule
+from vhdllint.syntaxrules import SyntaxVisitorRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 import libghdl.iirs as iirs
 import libghdl.thin as thin
-import libghdl.thinutils as thinutils
 import libghdl.elocations as elocs
 import vhdllint.utils as utils
 
 
-class CheckComplexStmtLayout(SyntaxRule):
+class CheckComplexStmtLayout(SyntaxVisitorRule):
     """Check complex statement layout:
        'then' must be either on the same line or same column as 'if'/'elsif',
        'loop' must be on the same line or same column as 'for'/'while',
@@ -20,16 +19,12 @@ class CheckComplexStmtLayout(SyntaxRule):
         super(self.__class__, self).__init__(name)
 
     def chk_line_or_col(self, n, def_loc, loc):
-        fe = thin.Location_To_File(def_loc)
-        l_fe = thin.Location_To_File(loc)
+        fe, def_line, def_col = utils.Location_To_File_Line_Col(def_loc)
+        l_fe, line, col = utils.Location_To_File_Line_Col(loc)
         assert fe == l_fe, "non-matching file location {} vs {}".format(
             def_loc, loc)
-        def_line = thin.Location_File_To_Line(def_loc, fe)
-        line = thin.Location_File_To_Line(loc, fe)
         if line == def_line:
             return
-        def_col = thin.Location_File_Line_To_Col(def_loc, fe, def_line)
-        col = thin.Location_File_Line_To_Col(loc, fe, line)
         if def_col != col:
             self.error(
                 utils.Location.from_location(loc),
@@ -44,28 +39,20 @@ class CheckComplexStmtLayout(SyntaxRule):
                 self.chk_line_or_col(n, loc, then_loc)
             n = iirs.Get_Else_Clause(n)
 
-    def check(self, input, ast):
-        for n in thinutils.constructs_iter(ast):
-            k = iirs.Get_Kind(n)
-            if k in iirs.Iir_Kinds.Subprogram_Body \
-               or k in iirs.Iir_Kinds.Process_Statement:
-                for n1 in thinutils.sequential_iter(n):
-                    k = iirs.Get_Kind(n1)
-                    if k == iirs.Iir_Kind.If_Statement:
-                        self.chk_if_stmt(n1)
-                    elif (k == iirs.Iir_Kind.For_Loop_Statement
-                          or k == iirs.Iir_Kind.While_Loop_Statement):
-                        self.chk_line_or_col(
-                            n1, iirs.Get_Location(n1),
-                            elocs.Get_Loop_Location(n1))
-                    elif k == iirs.Iir_Kind.Case_Statement:
-                        pass
-            elif k == iirs.Iir_Kind.For_Generate_Statement:
-                self.chk_line_or_col(
-                    n, iirs.Get_Location(n), elocs.Get_Generate_Location(n))
-            elif k == iirs.Iir_Kind.If_Generate_Statement:
-                self.chk_line_or_col(
-                    n, iirs.Get_Location(n), elocs.Get_Generate_Location(n))
+    def enter_if_statement(self, n, ctxt):
+        self.chk_if_stmt(n)
+
+    def enter_for_loop_statement(self, n, ctxt):
+        self.chk_line_or_col(
+            n, iirs.Get_Location(n), elocs.Get_Loop_Location(n))
+
+    enter_while_loop_statement = enter_for_loop_statement
+
+    def enter_for_generate_statement(self, n, ctxt):
+        self.chk_line_or_col(
+            n, iirs.Get_Location(n), elocs.Get_Generate_Location(n))
+
+    enter_if_generate_statement = enter_for_generate_statement
 
     @staticmethod
     def test(runner):
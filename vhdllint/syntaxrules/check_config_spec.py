@@ -8,6 +8,7 @@ class CheckConfigSpec(SyntaxNodeRule):
     """Check no configuration specification."""
 
     rulename = 'ConfigSpec'
+    kinds = [iirs.Iir_Kind.Configuration_Specification]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -1,4 +1,4 @@
-from vhdllint.syntaxrules import SyntaxRule
+from vhdllint.syntaxrules import SyntaxVisitorRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 from vhdllint.utils import Location
 import libghdl.thinutils as thinutils
@@ -7,7 +7,7 @@ import libghdl.std_names as std_names
 import vhdllint.utils as utils
 
 
-class CheckContextClauses(SyntaxRule):
+class CheckContextClauses(SyntaxVisitorRule):
     """Check that context clauses are organized by groups.
        No library clause for 'std' or 'work'."""
 
@@ -108,20 +108,19 @@ class CheckContextClauses(SyntaxRule):
                  'library': iirs.Get_Identifier(lib_prefix),
                  'line': ln}]
 
-    def check(self, input, file):
-        for unit in thinutils.chain_iter(iirs.Get_First_Design_Unit(file)):
-            # Extract the list of clauses
-            clauses = []
-            for cl in thinutils.chain_iter(iirs.Get_Context_Items(unit)):
-                k = iirs.Get_Kind(cl)
-                if k == iirs.Iir_Kind.Library_Clause:
-                    clauses.extend(self.extract_library(cl))
-                elif k == iirs.Iir_Kind.Use_Clause:
-                    clauses.extend(self.extract_use(cl))
-                else:
-                    assert False, "unknown context clause"
-            if clauses:
-                self.check_group(clauses)
+    def enter_design_unit(self, unit, ctxt):
+        # Extract the list of clauses
+        clauses = []
+        for cl in thinutils.chain_iter(iirs.Get_Context_Items(unit)):
+            k = iirs.Get_Kind(cl)
+            if k == iirs.Iir_Kind.Library_Clause:
+                clauses.extend(self.extract_library(cl))
+            elif k == iirs.Iir_Kind.Use_Clause:
+                clauses.extend(self.extract_use(cl))
+            else:
+                assert False, "unknown context clause"
+        if clauses:
+            self.check_group(clauses)
 
     @staticmethod
     def test(runner):
@@ -8,6 +8,7 @@ class CheckContextUse(SyntaxNodeRule):
     """Check use clauses are placed in context clauses."""
 
     rulename = 'ContextUse'
+    kinds = [iirs.Iir_Kind.Use_Clause]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
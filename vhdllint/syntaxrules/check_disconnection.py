@@ -8,6 +8,7 @@ class CheckDisconnection(SyntaxNodeRule):
     """Check no disconnection specification."""
 
     rulename = 'Disconnection'
+    kinds = [iirs.Iir_Kind.Disconnection_Specification]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -10,6 +10,25 @@ class CheckEndLabel(SyntaxNodeRule):
     """Check no group nor group template declaration."""
 
     rulename = 'EndLabel'
+    # Nodes with an optional label or designator after 'end'.
+    _end_kinds = [iirs.Iir_Kind.Entity_Declaration,
+                  iirs.Iir_Kind.Package_Declaration,
+                  iirs.Iir_Kind.Package_Body,
+                  iirs.Iir_Kind.Architecture_Body,
+                  iirs.Iir_Kind.Configuration_Declaration,
+                  iirs.Iir_Kind.Protected_Type_Declaration,
+                  iirs.Iir_Kind.For_Loop_Statement,
+                  iirs.Iir_Kind.While_Loop_Statement,
+                  iirs.Iir_Kind.Case_Statement,
+                  iirs.Iir_Kind.If_Statement,
+                  iirs.Iir_Kind.Block_Statement,
+                  iirs.Iir_Kind.Sensitized_Process_Statement,
+                  iirs.Iir_Kind.Process_Statement,
+                  iirs.Iir_Kind.If_Generate_Statement,
+                  iirs.Iir_Kind.For_Generate_Statement]
+    _subprg_kinds = [iirs.Iir_Kind.Procedure_Body,
+                     iirs.Iir_Kind.Function_Body]
+    kinds = _end_kinds + _subprg_kinds + [iirs.Iir_Kind.Type_Declaration]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -24,24 +43,9 @@ class CheckEndLabel(SyntaxNodeRule):
 
     def check(self, input, node):
         k = iirs.Get_Kind(node)
-        if k in [iirs.Iir_Kind.Entity_Declaration,
-                 iirs.Iir_Kind.Package_Declaration,
-                 iirs.Iir_Kind.Package_Body,
-                 iirs.Iir_Kind.Architecture_Body,
-                 iirs.Iir_Kind.Configuration_Declaration,
-                 iirs.Iir_Kind.Protected_Type_Declaration,
-                 iirs.Iir_Kind.For_Loop_Statement,
-                 iirs.Iir_Kind.While_Loop_Statement,
-                 iirs.Iir_Kind.Case_Statement,
-                 iirs.Iir_Kind.If_Statement,
-                 iirs.Iir_Kind.Block_Statement,
-                 iirs.Iir_Kind.Sensitized_Process_Statement,
-                 iirs.Iir_Kind.Process_Statement,
-                 iirs.Iir_Kind.If_Generate_Statement,
-                 iirs.Iir_Kind.For_Generate_Statement]:
+        if k in self._end_kinds:
             self.check_end(node, node)
-        elif k in [iirs.Iir_Kind.Procedure_Body,
-                   iirs.Iir_Kind.Function_Body]:
+        elif k in self._subprg_kinds:
             idnode = iirs.Get_Subprogram_Specification(node)
             self.check_end(node, idnode)
         elif k == iirs.Iir_Kind.Type_Declaration:
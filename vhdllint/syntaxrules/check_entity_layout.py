@@ -1,4 +1,4 @@
-from vhdllint.syntaxrules import SyntaxRule
+from vhdllint.syntaxrules import SyntaxVisitorRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 import vhdllint.utils as utils
 from vhdllint.utils import Location
@@ -8,7 +8,7 @@ import libghdl.thinutils as thinutils
 import libghdl.elocations as elocations
 
 
-class CheckEntityLayout(SyntaxRule):
+class CheckEntityLayout(SyntaxVisitorRule):
     """Check layout of entity declarations.
        Ports and generics must be declared one per line,
        name, ':', subtype indication and ':=' must be aligned."""
@@ -66,23 +66,19 @@ class CheckEntityLayout(SyntaxRule):
             line = ln
             decl = iirs.Get_Chain(decl)
 
-    def check(self, input, ast):
-        for du in thinutils.chain_iter(iirs.Get_First_Design_Unit(ast)):
-            ent = iirs.Get_Library_Unit(du)
-            if iirs.Get_Kind(ent) != iirs.Iir_Kind.Entity_Declaration:
-                continue
-            gen = iirs.Get_Generic_Chain(ent)
-            if gen != thin.Null_Iir:
-                self.check_declarations(gen)
-            ports = iirs.Get_Port_Chain(ent)
-            if ports != thin.Null_Iir:
-                self.check_declarations(ports)
-                port = ports
-                while port != thin.Null_Iir:
-                    if not iirs.Get_Has_Mode(port):
-                        self.error(Location.from_node(port),
-                                   "in/out/inout required for port")
-                    port = iirs.Get_Chain(port)
+    def enter_entity_declaration(self, ent, ctxt):
+        gen = iirs.Get_Generic_Chain(ent)
+        if gen != thin.Null_Iir:
+            self.check_declarations(gen)
+        ports = iirs.Get_Port_Chain(ent)
+        if ports != thin.Null_Iir:
+            self.check_declarations(ports)
+            port = ports
+            while port != thin.Null_Iir:
+                if not iirs.Get_Has_Mode(port):
+                    self.error(Location.from_node(port),
+                               "in/out/inout required for port")
+                port = iirs.Get_Chain(port)
 
     @staticmethod
     def test(runner):
@@ -9,6 +9,7 @@ class CheckEnum(SyntaxNodeRule):
     """Check names of enumeration literals."""
 
     rulename = 'EnumName'
+    kinds = [iirs.Iir_Kind.Enumeration_Literal]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -9,6 +9,7 @@ class CheckEnumCharLit(SyntaxNodeRule):
     """Check no character for enumeration literal."""
 
     rulename = 'NoCharEnumLit'
+    kinds = [iirs.Iir_Kind.Enumeration_Literal]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -1,6 +1,7 @@
 from vhdllint.syntaxrules import SyntaxNodeRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 from vhdllint.utils import Location
+import libghdl.iirs as iirs
 import vhdllint.nodeutils as nodeutils
 
 
@@ -8,6 +9,7 @@ class CheckGenerics(SyntaxNodeRule):
     """Check names of generics."""
 
     rulename = 'GenericsName'
+    kinds = [iirs.Iir_Kind.Interface_Constant_Declaration]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -8,6 +8,8 @@ class CheckGroup(SyntaxNodeRule):
     """Check no group nor group template declaration."""
 
     rulename = 'GroupDeclaration'
+    kinds = [iirs.Iir_Kind.Group_Declaration,
+             iirs.Iir_Kind.Group_Template_Declaration]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -9,6 +9,8 @@ class CheckGuardedSignals(SyntaxNodeRule):
     """Check no guarded signals."""
 
     rulename = 'GuardedSignals'
+    kinds = [iirs.Iir_Kind.Signal_Declaration,
+             iirs.Iir_Kind.Interface_Signal_Declaration]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
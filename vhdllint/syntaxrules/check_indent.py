@@ -20,9 +20,7 @@ class CheckIndent(SyntaxRule):
     def chk_level(self, n, loc, level):
         if loc == thin.No_Location:
             return
-        fe = thin.Location_To_File(loc)
-        line = thin.Location_File_To_Line(loc, fe)
-        col = thin.Location_File_Line_To_Col(loc, fe, line)
+        _, _, col = utils.Location_To_File_Line_Col(loc)
         if col != level:
             self.error(
                 utils.Location.from_location(loc),
@@ -31,16 +29,12 @@ class CheckIndent(SyntaxRule):
             # thin.Disp_Iir(n, 0, 1)
 
     def chk_line_or_col(self, n, def_loc, loc):
-        fe = thin.Location_To_File(def_loc)
-        l_fe = thin.Location_To_File(loc)
+        fe, def_line, def_col = utils.Location_To_File_Line_Col(def_loc)
+        l_fe, line, col = utils.Location_To_File_Line_Col(loc)
         assert fe == l_fe, "non-matching file location {} vs {}".format(
             def_loc, loc)
-        def_line = thin.Location_File_To_Line(def_loc, fe)
-        line = thin.Location_File_To_Line(loc, fe)
         if line == def_line:
             return
-        def_col = thin.Location_File_Line_To_Col(def_loc, fe, def_line)
-        col = thin.Location_File_Line_To_Col(loc, fe, line)
         if def_col != col:
             self.error(
                 utils.Location.from_location(loc),
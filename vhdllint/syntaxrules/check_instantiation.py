@@ -1,14 +1,13 @@
-from vhdllint.syntaxrules import SyntaxRule
+from vhdllint.syntaxrules import SyntaxVisitorRule
 from vhdllint.rulesexec import TestRunOK, TestRunFail
 import vhdllint.utils as utils
 from vhdllint.utils import Location
 import libghdl.iirs as iirs
 import libghdl.thin as thin
-import libghdl.thinutils as thinutils
 import libghdl.elocations as elocations
 
 
-class CheckInstantiation(SyntaxRule):
+class CheckInstantiation(SyntaxVisitorRule):
     """Check layout of component instantiation"""
     # TODO: check order (need sem)
     # check 'generic' and 'port' on a different line
@@ -38,13 +37,9 @@ class CheckInstantiation(SyntaxRule):
                 line = ln
             assoc = iirs.Get_Chain(assoc)
 
-    def check(self, input, ast):
-        for node in thinutils.concurrent_stmts_iter(ast):
-            k = iirs.Get_Kind(node)
-            if k != iirs.Iir_Kind.Component_Instantiation_Statement:
-                continue
-            self.check_associations(iirs.Get_Generic_Map_Aspect_Chain(node))
-            self.check_associations(iirs.Get_Port_Map_Aspect_Chain(node))
+    def enter_component_instantiation_statement(self, node, ctxt):
+        self.check_associations(iirs.Get_Generic_Map_Aspect_Chain(node))
+        self.check_associations(iirs.Get_Port_Map_Aspect_Chain(node))
 
     @staticmethod
     def test(runner):
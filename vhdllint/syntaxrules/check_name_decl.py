@@ -17,6 +17,7 @@ class CheckNameDecl(SyntaxNodeRule):
         """
         super(self.__class__, self).__init__(name)
         self.kind = kind
+        self.kinds = [kind]
         self.predicate = predicate
 
     def check_predicate(self, p, node, s):
@@ -10,6 +10,23 @@ class CheckParenthesis(SyntaxNodeRule):
     """Check for useless parenthesis."""
 
     rulename = 'Parenthesis'
+    # Nodes with a condition.
+    _cond_kinds = [iirs.Iir_Kind.If_Statement,
+                   iirs.Iir_Kind.Elsif,
+                   iirs.Iir_Kind.While_Loop_Statement,
+                   iirs.Iir_Kind.Exit_Statement,
+                   iirs.Iir_Kind.Next_Statement,
+                   iirs.Iir_Kind.If_Generate_Statement,
+                   iirs.Iir_Kind.If_Generate_Else_Clause,
+                   iirs.Iir_Kind.Conditional_Waveform,
+                   iirs.Iir_Kind.Conditional_Expression]
+    # Nodes with an expression.
+    _expr_kinds = [iirs.Iir_Kind.Case_Generate_Statement,
+                   iirs.Iir_Kind.Case_Statement,
+                   iirs.Iir_Kind.Concurrent_Selected_Signal_Assignment,
+                   iirs.Iir_Kind.Selected_Waveform_Assignment_Statement,
+                   iirs.Iir_Kind.Return_Statement]
+    kinds = _cond_kinds + _expr_kinds
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -34,21 +51,9 @@ class CheckParenthesis(SyntaxNodeRule):
 
     def check(self, input, node):
         k = iirs.Get_Kind(node)
-        if k in [iirs.Iir_Kind.If_Statement,
-                 iirs.Iir_Kind.Elsif,
-                 iirs.Iir_Kind.While_Loop_Statement,
-                 iirs.Iir_Kind.Exit_Statement,
-                 iirs.Iir_Kind.Next_Statement,
-                 iirs.Iir_Kind.If_Generate_Statement,
-                 iirs.Iir_Kind.If_Generate_Else_Clause,
-                 iirs.Iir_Kind.Conditional_Waveform,
-                 iirs.Iir_Kind.Conditional_Expression]:
+        if k in self._cond_kinds:
             self.check_parenthesis(iirs.Get_Condition(node))
-        elif k in [iirs.Iir_Kind.Case_Generate_Statement,
-                   iirs.Iir_Kind.Case_Statement,
-                   iirs.Iir_Kind.Concurrent_Selected_Signal_Assignment,
-                   iirs.Iir_Kind.Selected_Waveform_Assignment_Statement,
-                   iirs.Iir_Kind.Return_Statement]:
+        elif k in self._expr_kinds:
             self.check_parenthesis(iirs.Get_Expression(node))
 
     @staticmethod
@@ -9,6 +9,7 @@ class CheckPortsMode(SyntaxNodeRule):
     """Check mode of ports."""
 
     rulename = 'PortMode'
+    kinds = [iirs.Iir_Kind.Interface_Signal_Declaration]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -9,6 +9,8 @@ class CheckSignalsName(SyntaxNodeRule):
     """Check names of signals."""
 
     rulename = 'SignalsName'
+    kinds = [iirs.Iir_Kind.Interface_Signal_Declaration,
+             iirs.Iir_Kind.Signal_Declaration]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
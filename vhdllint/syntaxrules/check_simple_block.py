@@ -10,6 +10,7 @@ class CheckSimpleBlock(SyntaxNodeRule):
     implicit GUARD signal."""
 
     rulename = 'BlockStatement'
+    kinds = [iirs.Iir_Kind.Block_Statement]
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -7,6 +7,10 @@ from vhdllint.rule import Rule
 
 
 class SynthesisRule(Rule):
+    # Kinds of the constructs that the rule gets from the mirror (see
+    # SemRule.mirror_kinds).
+    mirror_kinds = ()
+
     def __init__(self, rulename):
         super(SynthesisRule, self).__init__(rulename)
 
@@ -11,6 +11,7 @@ class CheckProcesses(SynthesisRule):
     """Check processes: only processes with a sensitivity list."""
 
     rulename = 'SynthProcesses'
+    mirror_kinds = iirs.Iir_Kinds.Process_Statement
 
     def __init__(self, name=None):
         super(self.__class__, self).__init__(name)
@@ -82,16 +83,15 @@ class CheckProcesses(SynthesisRule):
         thin.Lists.Destroy_Iir_List(clist)
 
     def check(self, input, unit):
-        for n in thinutils.concurrent_stmts_iter(unit):
-            k = iirs.Get_Kind(n)
+        mirror = input.mirror
+        procs = mirror.nodes_of_kind(self.mirror_kinds, unit)
+        for n in procs:
+            k = mirror.get_kind(n)
             if k == iirs.Iir_Kind.Process_Statement:
                 self.error(Location.from_node(n),
                            "non-sentized process not allowed in synth unit")
-            elif k == iirs.Iir_Kind.Sensitized_Process_Statement:
-                self.check_process(n)
             else:
-                # Check for non-postponed ?
-                pass
+                self.check_process(n)
 
     @staticmethod
     def test(runner):
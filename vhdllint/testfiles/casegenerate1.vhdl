@@ -0,0 +1,19 @@
+entity casegenerate1 is
+  generic (sel : natural := 0);
+end;
+
+architecture behav of casegenerate1 is
+begin
+  g: case sel generate
+    when 0 =>
+      process
+      begin
+        wait;
+      end process;
+    when others =>
+      tchk: process
+      begin
+        wait;
+      end process;
+  end generate g;
+end behav;
@@ -0,0 +1,11 @@
+entity locations1 is
+	port (a	: in bit;
+	      b :	out bit);
+end locations1;
+
+architecture behav of locations1 is
+	signal	s, t : bit;
+begin
+  t  <=	a;	-- Tab at column 8.
+	b <=	t;
+end	behav;
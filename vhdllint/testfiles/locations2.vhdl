@@ -0,0 +1,11 @@
+entity locations2 is
+	port (a	: in bit;
+	      b :	out bit);
+end locations2;
+
+architecture behav of locations2 is
+	signal	s, t : bit;
+begin
+  t  <=	a;	-- Tab at column 8.
+	b <=	t;
+end	behav;
\ No newline at end of file
@@ -0,0 +1,44 @@
+entity mirror1_sub is
+  port (i : bit;
+        o : out bit);
+end mirror1_sub;
+
+architecture behav of mirror1_sub is
+begin
+  o <= i;
+end behav;
+
+entity mirror1 is
+  port (i : bit_vector (3 downto 0);
+        o : out bit_vector (3 downto 0);
+        r : out bit);
+end mirror1;
+
+architecture behav of mirror1 is
+  component mirror1_sub is
+    port (i : bit;
+          o : out bit);
+  end component;
+  signal s : bit;
+begin
+  gen : for n in i'range generate
+    inst : mirror1_sub port map (i => i (n), o => o (n));
+  end generate;
+
+  blk : block
+  begin
+    process (i)
+    begin
+      s <= i (0);
+    end process;
+  end block;
+
+  gen2 : if true generate
+    process
+    begin
+      wait on s;
+    end process;
+
+    inst2 : mirror1_sub port map (i => s, o => r);
+  end generate;
+end behav;
@@ -0,0 +1,15 @@
+entity unused5 is
+  port (a : bit;
+        b : bit);
+end;
+
+architecture behav of unused5 is
+begin
+  --  b is referenced by the other architecture.
+  assert a = '1';
+end;
+
+architecture rtl of unused5 is
+begin
+  assert b = '1';
+end;
@@ -0,0 +1,15 @@
+entity unused6 is
+  port (a : bit;
+        b : bit);
+end;
+
+architecture behav of unused6 is
+begin
+  --  b is not used by any architecture.
+  assert a = '1';
+end;
+
+architecture rtl of unused6 is
+begin
+  assert a = '0';
+end;
@@ -0,0 +1,93 @@
+"""Stream of tokens of a file.
+
+   The file is scanned once and the tokens are recorded in compact arrays,
+   so that they can be replayed to several consumers (lexical rules,
+   comments table) without scanning the file again.  Only the kind and the
+   positions of the tokens are recorded; their line and column are computed
+   in Python when needed, from a LineTable of the file."""
+
+from array import array
+import libghdl.thin as thin
+import libghdl.tokens as tokens
+from vhdllint.utils import LineTable, TokLocation
+
+
+class TokenStream(object):
+    def __init__(self, fe):
+        self.fe = fe
+        self.kinds = array('H')     # Token (tokens.Tok)
+        self.starts = array('I')    # Position of the first character
+        self.ends = array('I')      # Position after the last character
+        self._table = None
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @classmethod
+    def scan(cls, fe):
+        """Scan source file fe (including comments) and return its tokens.
+           The last token is always Eof."""
+        res = cls(fe)
+        kinds_append = res.kinds.append
+        starts_append = res.starts.append
+        ends_append = res.ends.append
+        scanner = thin.Scanner
+        current_token = scanner.Current_Token
+        get_token_position = scanner.Get_Token_Position
+        get_position = scanner.Get_Position
+        scan = scanner.Scan
+        eof = tokens.Tok.Eof
+        flag_comment = scanner.Flag_Comment.value
+        scanner.Flag_Comment.value = True
+        scanner.Set_File(fe)
+        while True:
+            scan()
+            tok = current_token.value
+            kinds_append(tok)
+            starts_append(get_token_position())
+            ends_append(get_position())
+            if tok == eof:
+                break
+        scanner.Close_File()
+        scanner.Flag_Comment.value = flag_comment
+        return res
+
+    @property
+    def table(self):
+        """LineTable of the file (created when first needed)."""
+        if self._table is None:
+            # Only positions are converted, so the first location is not
+            # needed.
+            self._table = LineTable(self.fe, 0)
+        return self._table
+
+    def get_line(self, i):
+        """Return the line of token i."""
+        return self.table.pos_to_line(self.starts[i])
+
+    def get_location(self, filename, i):
+        """Return the TokLocation of token i."""
+        return TokLocation(filename, self.table, self.starts[i], self.ends[i])
+
+    def comments(self):
+        """Return the comments, indexed by line number, as a tuple of
+           start and end position."""
+        res = {}
+        comment = tokens.Tok.Comment
+        for i, tok in enumerate(self.kinds):
+            if tok == comment:
+                res[self.get_line(i)] = (self.starts[i], self.ends[i])
+        return res
+
+    def replay(self, filename, filebuf, tok_rules):
+        """Call the lexical rules on each token.  tok_rules is a list indexed
+           by token of the lists of rules to be called."""
+        table = self.table
+        starts = self.starts
+        ends = self.ends
+        for i, tok in enumerate(self.kinds):
+            rules = tok_rules[tok]
+            if rules:
+                loc = TokLocation(filename, table, starts[i], ends[i])
+                for r in rules:
+                    r.check(loc, filebuf, tok)
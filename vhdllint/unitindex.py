@@ -0,0 +1,272 @@
+"""Index of the design units of a source tree.
+
+   The index records, for each VHDL file of the tree, its modification
+   time, size and hash, its library and the units it declares (with their
+   byte offsets) and references (as found by unitscan).  It is saved in a
+   compact JSON file, with the file names relative to the directory of the
+   index.  When the index is updated, only the files whose time or size
+   have changed are read, and only those whose hash has changed are
+   scanned again.
+
+   The index can be used by the executor (--index=FILE) instead of lists of
+   --import files: the files which declare the units used by the checked
+   files are imported."""
+
+import hashlib
+import json
+import os
+import sys
+import vhdllint.unitscan as unitscan
+
+VERSION = 1
+
+DEFAULT_INDEX = 'vhdllint.index'
+
+# Libraries which can be indexed: all the units are analyzed in the work
+# library.
+LIBRARIES = ('work',)
+
+# Extensions of the VHDL files.
+EXTENSIONS = ('.vhd', '.vhdl')
+
+
+def _stamp(filename):
+    """Return the (mtime, size) of filename, or None if it doesn't exist."""
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return None
+    return (st.st_mtime, st.st_size)
+
+
+class UnitIndex(object):
+    def __init__(self, filename):
+        self._filename = filename
+        self._dir = os.path.dirname(os.path.abspath(filename))
+        # Entries indexed by file name (relative to the index directory).
+        self._files = {}
+        self._modified = False
+
+    def load(self):
+        """Load the index file (if it exists and is valid)."""
+        try:
+            with open(self._filename) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return
+        if data.get('version') == VERSION:
+            self._files = data['files']
+
+    def save(self):
+        tmp = self._filename + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'version': VERSION, 'files': self._files}, f,
+                      separators=(',', ':'), sort_keys=True)
+        os.rename(tmp, self._filename)
+        self._modified = False
+
+    def is_modified(self):
+        """Return True if files were recorded by scan since the index was
+           loaded or saved."""
+        return self._modified
+
+    def get_libraries(self):
+        """Return the set of libraries of the indexed files."""
+        return set(e['library'] for e in self._files.values())
+
+    def _relpath(self, filename):
+        return os.path.relpath(os.path.abspath(filename), self._dir)
+
+    def _path(self, rel):
+        """Return the name (relative to the current directory if possible)
+           of the indexed file rel."""
+        path = os.path.join(self._dir, rel)
+        cwd = os.getcwd()
+        if path.startswith(os.path.join(cwd, '')):
+            return os.path.relpath(path, cwd)
+        return path
+
+    def get_filenames(self):
+        """Return the names of the indexed files (sorted)."""
+        return [self._path(rel) for rel in sorted(self._files)]
+
+    def _scan_entry(self, filename, library, old):
+        """Return the entry for filename, reusing entry old (or None) when
+           the file hasn't changed."""
+        stamp = _stamp(filename)
+        if stamp is None:
+            return None
+        if old is not None and [old['mtime'], old['size']] == list(stamp) \
+           and old['library'] == library:
+            return old
+        try:
+            with open(filename, 'rb') as f:
+                buf = f.read()
+        except (IOError, OSError):
+            return None
+        h = hashlib.sha1(buf).hexdigest()
+        if old is not None and old['hash'] == h:
+            entry = dict(old)
+        else:
+            s = unitscan.scan(buf)
+            starts = [u[3] for u in s.units] + [len(buf)]
+            entry = {'hash': h,
+                     'units': [[kind, name, ent, start, starts[i + 1]]
+                               for i, (kind, name, ent, start)
+                               in enumerate(s.units)],
+                     'refs': sorted(s.references)}
+        entry['mtime'] = stamp[0]
+        entry['size'] = stamp[1]
+        entry['library'] = library
+        return entry
+
+    def update(self, dirs):
+        """Index the VHDL files in the directories of dirs (a list of
+           (directory, library)).  Files not in these directories anymore
+           are removed from the index.  Return the number of files
+           scanned."""
+        files = {}
+        nbr_scanned = 0
+        for top, library in dirs:
+            for root, subdirs, names in os.walk(top):
+                subdirs.sort()
+                for name in sorted(names):
+                    if not name.lower().endswith(EXTENSIONS):
+                        continue
+                    filename = os.path.join(root, name)
+                    rel = self._relpath(filename)
+                    old = self._files.get(rel)
+                    entry = self._scan_entry(filename, library, old)
+                    if entry is None:
+                        continue
+                    if old is None or entry.get('hash') != old.get('hash'):
+                        nbr_scanned += 1
+                    files[rel] = entry
+        self._files = files
+        return nbr_scanned
+
+    def scan(self, filename, record=False):
+        """Return the unitscan.ScanResult of filename, from the index if the
+           file hasn't changed.  Return None if it cannot be read.  If
+           record is True, the file is (re)indexed when needed."""
+        rel = self._relpath(filename)
+        entry = self._files.get(rel)
+        if entry is None or [entry['mtime'], entry['size']] \
+           != list(_stamp(filename) or []):
+            if not record:
+                return unitscan.scan_file(filename)
+            entry = self._scan_entry(filename, 'work', entry)
+            if entry is None:
+                return None
+            self._files[rel] = entry
+            self._modified = True
+        res = unitscan.ScanResult()
+        res.units = [tuple(u[:4]) for u in entry['units']]
+        res.references = set(entry['refs'])
+        return res
+
+
+def usage():
+    print('usage: {0} index [--index=FILE] [--library=LIB] DIRS...'.format(
+        sys.argv[0]))
+    print('Index the VHDL files of DIRS (in library LIB, work by default,')
+    print('the only library supported)')
+    print('into FILE (' + DEFAULT_INDEX + ' by default)')
+
+
+def main(argv):
+    """Entry point of the index command (argv are its arguments)."""
+    filename = DEFAULT_INDEX
+    library = 'work'
+    dirs = []
+    for arg in argv:
+        if arg in ['-h', '--help']:
+            usage()
+            sys.exit(0)
+        elif arg.startswith('--index='):
+            filename = arg[8:]
+        elif arg.startswith('--library='):
+            library = arg[10:].lower()
+            if library not in LIBRARIES:
+                print('library {0} is not supported, the units are '
+                      'analyzed in the work library'.format(library))
+                sys.exit(2)
+        elif arg.startswith('-'):
+            print('unknown option {0}'.format(arg))
+            usage()
+            sys.exit(2)
+        else:
+            dirs.append((arg, library))
+    if not dirs:
+        print('no directory')
+        sys.exit(2)
+    idx = UnitIndex(filename)
+    idx.load()
+    nbr_scanned = idx.update(dirs)
+    idx.save()
+    nbr_files = len(idx.get_filenames())
+    print('{0} file{1} indexed, {2} scanned'.format(
+        nbr_files, '' if nbr_files < 2 else 's', nbr_scanned))
+    sys.exit(0)
+
+
+def test(runner):
+    """Testsuite of the index (runner is the executor of the testsuite)."""
+    import shutil
+    import tempfile
+    from vhdllint.rulesexec import test_failed
+
+    def run(args):
+        """Run the index command, return its exit status."""
+        try:
+            main(args)
+        except SystemExit as e:
+            return e.code
+        return None
+
+    print('  test: index command')
+    tmpdir = tempfile.mkdtemp(prefix='vhdllint-test-')
+    try:
+        src = os.path.join(tmpdir, 'src')
+        os.makedirs(os.path.join(src, 'sub'))
+        files = {'pkg.vhdl': b'package pkg is end;\n',
+                 os.path.join('sub', 'top.vhd'):
+                 b'use work.pkg.all;\nentity top is end;\n',
+                 'notes.txt': b'entity notes is end;\n'}
+        for name, text in files.items():
+            with open(os.path.join(src, name), 'wb') as f:
+                f.write(text)
+        filename = os.path.join(tmpdir, DEFAULT_INDEX)
+        status = run(['--index=' + filename, src])
+        idx = UnitIndex(filename)
+        idx.load()
+        names = [os.path.relpath(f, src) for f in idx.get_filenames()]
+        if status != 0 \
+           or names != ['pkg.vhdl', os.path.join('sub', 'top.vhd')]:
+            test_failed(runner, 'unitindex', 'indexed files: {0}'.format(
+                names))
+        top = os.path.join(src, 'sub', 'top.vhd')
+        s = idx.scan(top)
+        expected = unitscan.scan_file(top)
+        if s is None or s.units != expected.units \
+           or s.references != expected.references:
+            test_failed(runner, 'unitindex', 'scan of the index')
+
+        print('  test: index update')
+        with open(top, 'ab') as f:
+            f.write(b'architecture a of top is begin end;\n')
+        nbr_scanned = idx.update([(src, 'work')])
+        units = [u[:3] for u in idx.scan(top).units]
+        if nbr_scanned != 1 \
+           or units != [(unitscan.ENTITY, 'top', None),
+                        (unitscan.ARCHITECTURE, 'a', 'top')]:
+            test_failed(runner, 'unitindex', 'update: {0} scanned, {1}'
+                        .format(nbr_scanned, units))
+        if idx.update([(src, 'work')]) != 0:
+            test_failed(runner, 'unitindex', 'unchanged files scanned')
+
+        print('  test: index of another library')
+        if run(['--index=' + filename, '--library=lib', src]) != 2:
+            test_failed(runner, 'unitindex', 'library lib accepted')
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
@@ -0,0 +1,197 @@
+"""Fast scan of the design units of VHDL files (without libghdl).
+
+   The scan uses regular expressions on the text (without the comments):
+   it finds the units declared by a file and the names the file references
+   (selected names whose prefix is a library, component names, and the
+   entity of architectures and configurations).  It may find too many
+   references, which is safe as it is used to select files."""
+
+import re
+
+# Kinds of units.
+ENTITY = 'entity'
+ARCHITECTURE = 'architecture'
+PACKAGE = 'package'
+PACKAGE_BODY = 'package body'
+CONFIGURATION = 'configuration'
+CONTEXT = 'context'
+
+PRIMARY_KINDS = (ENTITY, PACKAGE, CONFIGURATION, CONTEXT)
+
+_comment_re = re.compile(br'--[^\n\r]*')
+_unit_re = re.compile(
+    br'\b(?:(entity|package\s+body|package|context)\s+(\w+)\s+is'
+    br'|(architecture|configuration)\s+(\w+)\s+of\s+(\w+)\s+is)\b',
+    re.IGNORECASE)
+_library_re = re.compile(br'\blibrary\s+(\w+(?:\s*,\s*\w+)*)\s*;',
+                         re.IGNORECASE)
+_selected_re = re.compile(br'\b(\w+)\s*\.\s*(\w+)')
+_component_re = re.compile(
+    br'(?:\bcomponent\s+(\w+)'
+    br'|:\s*(\w+)\s+(?:generic|port)\s+map\b)', re.IGNORECASE)
+
+# Words which are not names of units.
+_reserved = frozenset([b'is', b'generic', b'port', b'map', b'entity',
+                       b'component', b'configuration'])
+
+
+class ScanResult(object):
+    def __init__(self):
+        # Units declared, as a list of (kind, name, entity, start offset).
+        # entity is the name of the entity for architectures and
+        # configurations, otherwise None.  Names are in lower case.
+        self.units = []
+        # Names (in lower case) referenced.
+        self.references = set()
+
+
+def scan(buf):
+    """Scan the text buf (bytes) of a VHDL file."""
+    res = ScanResult()
+    # Keep the offsets by replacing comments with spaces.
+    text = _comment_re.sub(lambda m: b' ' * len(m.group(0)), bytes(buf))
+    for m in _unit_re.finditer(text):
+        if m.group(1) is not None:
+            kind = b' '.join(m.group(1).lower().split()).decode('ascii')
+            res.units.append((kind, m.group(2).lower().decode('latin-1'),
+                              None, m.start()))
+        else:
+            kind = m.group(3).lower().decode('ascii')
+            ent = m.group(5).lower().decode('latin-1')
+            res.units.append((kind, m.group(4).lower().decode('latin-1'),
+                              ent, m.start()))
+            res.references.add(ent)
+    libs = set([b'work'])
+    for m in _library_re.finditer(text):
+        for lib in m.group(1).split(b','):
+            libs.add(lib.strip().lower())
+    for m in _selected_re.finditer(text):
+        if m.group(1).lower() in libs:
+            res.references.add(m.group(2).lower().decode('latin-1'))
+    for m in _component_re.finditer(text):
+        name = (m.group(1) or m.group(2)).lower()
+        if name not in _reserved:
+            res.references.add(name.decode('latin-1'))
+    # A package body references its package.
+    for kind, name, _, _ in res.units:
+        if kind == PACKAGE_BODY:
+            res.references.add(name)
+    return res
+
+
+def scan_file(filename):
+    """Scan file filename, return None if it cannot be read."""
+    try:
+        with open(filename, 'rb') as f:
+            return scan(f.read())
+    except (IOError, OSError):
+        return None
+
+
+def select_files(references, scans):
+    """Return the set of files (keys of scans, a dictionary of ScanResult
+       indexed by file name) that declare the primary units referenced by
+       references (a set of names), directly or not, and the files that
+       declare their secondary units (package bodies and architectures)."""
+    by_name = {}
+    for filename, s in scans.items():
+        for kind, name, ent, _ in s.units:
+            if kind in PRIMARY_KINDS:
+                by_name.setdefault(name, []).append(filename)
+            elif kind == PACKAGE_BODY:
+                by_name.setdefault(name, []).append(filename)
+            elif kind == ARCHITECTURE:
+                by_name.setdefault(ent, []).append(filename)
+    res = set()
+    todo = list(references)
+    seen = set(todo)
+    while todo:
+        for filename in by_name.get(todo.pop(), []):
+            if filename in res:
+                continue
+            res.add(filename)
+            for ref in scans[filename].references:
+                if ref not in seen:
+                    seen.add(ref)
+                    todo.append(ref)
+    return res
+
+
+def order_files(filenames, scans):
+    """Return filenames (which must be keys of scans) sorted so that the
+       files which declare units come before the files that reference
+       them (when there are no cycles)."""
+    by_name = {}
+    for filename in filenames:
+        for kind, name, _, _ in scans[filename].units:
+            by_name.setdefault(name, []).append(filename)
+    res = []
+    done = set()
+
+    def visit(filename):
+        if filename in done:
+            return
+        done.add(filename)
+        for ref in sorted(scans[filename].references):
+            for dep in by_name.get(ref, []):
+                visit(dep)
+        res.append(filename)
+
+    for filename in filenames:
+        visit(filename)
+    return res
+
+
+def test(runner):
+    """Testsuite of the scanner (runner is the executor of the
+       testsuite)."""
+    from vhdllint.rulesexec import test_failed
+
+    def check(name, found, expected):
+        if found != expected:
+            test_failed(runner, 'unitscan', '{0}: {1} instead of {2}'.format(
+                name, found, expected))
+
+    print('  test: scan')
+    text = (b'-- entity fake is\n'
+            b'library ieee, Lib2;\n'
+            b'use ieee.std_logic_1164.all;\n'
+            b'use lib2.pkg.all;\n'
+            b'package body PB is  -- package x is\n'
+            b'end pb;\n'
+            b'architecture a of top is\n'
+            b'  signal r : rec;\n'
+            b'begin\n'
+            b'  u1 : sub port map (x => r.field);\n'
+            b'  u2 : entity work.sub2 generic map (n => lib2.consts.n);\n'
+            b'end a;\n')
+    s = scan(text)
+    check('units', s.units,
+          [(PACKAGE_BODY, 'pb', None, text.find(b'package body')),
+           (ARCHITECTURE, 'a', 'top', text.find(b'architecture'))])
+    check('references', sorted(s.references),
+          ['consts', 'pb', 'pkg', 'std_logic_1164', 'sub', 'sub2', 'top'])
+
+    print('  test: select and order files')
+    scans = {
+        'top.vhdl': scan(b'entity top is end;\n'
+                         b'architecture a of top is begin\n'
+                         b'  u : mid port map (o => open);\n'
+                         b'end;\n'),
+        'mid.vhdl': scan(b'use work.pkg.all;\n'
+                         b'entity mid is port (o : out t); end;\n'),
+        'mid_arch.vhdl': scan(b'architecture a of mid is begin end;\n'),
+        'pkg.vhdl': scan(b'package pkg is end;\n'),
+        'pkg_body.vhdl': scan(b'package body pkg is end;\n'),
+        'other.vhdl': scan(b'entity other is end;\n')}
+    selected = select_files(set(['mid']), scans)
+    check('selected files', sorted(selected),
+          ['mid.vhdl', 'mid_arch.vhdl', 'pkg.vhdl', 'pkg_body.vhdl'])
+    order = order_files(sorted(scans), scans)
+    for before, after in [('pkg.vhdl', 'mid.vhdl'),
+                          ('pkg.vhdl', 'pkg_body.vhdl'),
+                          ('mid.vhdl', 'top.vhdl'),
+                          ('mid.vhdl', 'mid_arch.vhdl')]:
+        if order.index(before) > order.index(after):
+            test_failed(runner, 'unitscan', '{0} after {1} in {2}'.format(
+                before, after, order))
@@ -1,13 +1,145 @@
+import bisect
+import collections
+import ctypes
+import os
+import re
 import sys
+import tempfile
+from array import array
 import libghdl.iirs as iirs
 import libghdl.thin as thin
 
+# Tab stop used by libghdl to compute columns.
+TAB_STOP = 8
 
-def Location_To_File_Line_Col(loc):
+# Line terminators, as recognized by the libghdl scanner.
+_eol_re = re.compile(b'\r\n|\n\r|\r|\n')
+
+
+def line_starts(buf):
+    """Return the offsets of the start of the lines of buf (bytes), with the
+       line terminators of libghdl."""
+    res = array('I', [0])
+    res.extend([m.end() for m in _eol_re.finditer(buf)])
+    return res
+
+
+def col_to_offset(buf, start, col):
+    """Return the offset in buf of column col (a libghdl column, where tabs
+       are expanded) of the line starting at offset start."""
+    c = 1
+    pos = start
+    end = len(buf)
+    while c < col and pos < end and buf[pos:pos + 1] not in (b'\r', b'\n'):
+        if buf[pos:pos + 1] == b'\t':
+            c += TAB_STOP - c % TAB_STOP
+        c += 1
+        pos += 1
+    return pos
+
+
+class LineTable(object):
+    """Position of the start of each line of source file fe, to convert
+       a location to a line and a column (like libghdl) in Python."""
+
+    def __init__(self, fe, first):
+        self.fe = fe
+        self.first = first          # Location of the first character
+        self.buffer = file_buffer(fe)
+        self.last = first + len(self.buffer)
+        self.starts = line_starts(self.buffer)
+
+    def pos_to_line(self, pos):
+        return bisect.bisect_right(self.starts, pos)
+
+    def pos_to_col(self, pos, line):
+        start = self.starts[line - 1]
+        s = bytes(self.buffer[start:pos])
+        if b'\t' not in s:
+            return pos - start + 1
+        res = 1
+        for c in bytearray(s):
+            if c == 9:
+                res += TAB_STOP - res % TAB_STOP
+            res += 1
+        return res
+
+
+# Line tables of the files, sorted by first location.
+_tables_first = []
+_tables = []
+
+# Names of the last used file entries.
+_names = collections.OrderedDict()
+_NAMES_SIZE = 16
+
+
+def _line_table(loc):
+    """Return the LineTable for the file of location loc, or None if the
+       location is not in a source file (like an instance)."""
+    i = bisect.bisect_right(_tables_first, loc) - 1
+    if i >= 0 and loc <= _tables[i].last:
+        return _tables[i]
     fe = thin.Location_To_File(loc)
-    line = thin.Location_File_To_Line(loc, fe)
-    col = thin.Location_File_Line_To_Col(loc, fe, line)
-    return (fe, line, col)
+    if fe == thin.No_Source_File_Entry or thin.Get_File_Length(fe) == 0:
+        return None
+    res = LineTable(fe, loc - thin.Location_File_To_Pos(loc, fe))
+    if loc > res.last:
+        return None
+    i = bisect.bisect_left(_tables_first, res.first)
+    _tables_first.insert(i, res.first)
+    _tables.insert(i, res)
+    return res
+
+
+def forget_file(fe):
+    """Discard the tables for source file fe.  Must be called when the
+       buffer of fe is freed."""
+    for i, t in enumerate(_tables):
+        if t.fe == fe:
+            del _tables_first[i]
+            del _tables[i]
+            break
+    _names.pop(fe, None)
+
+
+def forget_all_files():
+    """Discard the tables of all the files, so that they don't accumulate
+       across executions (like in the daemon)."""
+    del _tables_first[:]
+    del _tables[:]
+    _names.clear()
+
+
+def file_entry_name(fe):
+    """Return the name of source file fe."""
+    res = _names.pop(fe, None)
+    if res is None:
+        res = thin.Get_Name_Ptr(thin.Get_File_Name(fe))
+        if len(_names) >= _NAMES_SIZE:
+            _names.popitem(last=False)
+    _names[fe] = res
+    return res
+
+
+def Location_To_File_Line(loc):
+    t = _line_table(loc)
+    if t is None:
+        fe = thin.Location_To_File(loc)
+        return (fe, thin.Location_File_To_Line(loc, fe))
+    return (t.fe, t.pos_to_line(loc - t.first))
+
+
+def Location_To_File_Line_Col(loc):
+    t = _line_table(loc)
+    if t is None:
+        fe = thin.Location_To_File(loc)
+        line = thin.Location_File_To_Line(loc, fe)
+        col = thin.Location_File_Line_To_Col(loc, fe, line)
+        return (fe, line, col)
+    pos = loc - t.first
+    line = t.pos_to_line(pos)
+    return (t.fe, line, t.pos_to_col(pos, line))
 
 
 class Location(object):
@@ -22,8 +154,7 @@ class Location(object):
     @classmethod
     def from_location(cls, loc):
         fe, line, col = Location_To_File_Line_Col(loc)
-        fid = thin.Get_File_Name(fe)
-        return cls(thin.Get_Name_Ptr(fid), line, col)
+        return cls(file_entry_name(fe), line, col)
 
     @classmethod
     def from_node(cls, n):
@@ -31,10 +162,211 @@ class Location(object):
 
 
 class TokLocation(Location):
-    def __init__(self, filename, line, col, start, end):
-        super(TokLocation, self).__init__(filename, line, col)
+    """Location of a token, from its position.  The line and column are
+       only computed (with table, a LineTable of the file) when accessed."""
+
+    def __init__(self, filename, table, start, end):
+        self.filename = filename
         self.start = start
         self.end = end
+        self._table = table
+        self._line = None
+
+    @property
+    def line(self):
+        if self._line is None:
+            self._line = self._table.pos_to_line(self.start)
+        return self._line
+
+    @property
+    def col(self):
+        return self._table.pos_to_col(self.start, self.line)
+
+
+def file_buffer(fe):
+    """Return the content of source file fe.  This is a memoryview of the
+       libghdl buffer (so there is no copy) of unsigned bytes."""
+    flen = thin.Get_File_Length(fe)
+    if not hasattr(memoryview, 'cast'):
+        # Python 2: cannot create a view of bytes from ctypes.
+        return ctypes.string_at(thin.Get_File_Buffer(fe), flen)
+    if flen == 0:
+        return memoryview(b'')
+    buf = (ctypes.c_ubyte * flen).from_address(thin.Get_File_Buffer(fe))
+    return memoryview(buf).cast('B')
+
+
+def release_file_buffer(fe):
+    """Free the buffer of source file fe in libghdl, which must be the
+       last file read.  Return False if this is not supported by libghdl
+       (the buffer is then kept)."""
+    unload = getattr(getattr(thin, 'libghdl', None),
+                     'files_map__unload_last_source_file', None)
+    if unload is None:
+        return False
+    forget_file(fe)
+    unload(fe)
+    return True
+
+
+def can_discard_file_buffer():
+    """Return True if libghdl supports discard_file_buffer."""
+    return getattr(getattr(thin, 'libghdl', None),
+                   'files_map__discard_source_file', None) is not None
+
+
+def discard_file_buffer(fe):
+    """Make source file fe unavailable in libghdl, so that a file with the
+       same name can be read again.  Return False if this is not supported
+       by libghdl."""
+    discard = getattr(getattr(thin, 'libghdl', None),
+                      'files_map__discard_source_file', None)
+    forget_file(fe)
+    if discard is None:
+        return False
+    discard(fe)
+    return True
+
+
+# What the single scan of a buffer looks for: the end of a line (and the
+# spaces and tabs before it, only tried at the start of a run of them), a
+# tab (HT, VT or FF) and a non-ASCII character.
+_facts_re = re.compile(b'(?<![ \t])([ \t]*)(\r\n|\r|\n|\Z)'
+                       b'|([\t\v\f])|[\x80-\xff]')
+
+# Tab characters recorded by FileLines.
+TABS = (b'\t', b'\v', b'\f')
+
+
+class FileLines(object):
+    """Sequence of the lines (with their line terminator) of a buffer.
+       Lines are split like bytes.splitlines, and are extracted only when
+       accessed.  The file rules are executed on the same FileLines, whose
+       facts about the lines are computed by a single scan of the buffer
+       (in C, only the ends of lines and the unusual characters are
+       handled in Python):
+       - offsets and ends: the positions of the lines and of their
+         terminator (see below), so the length of line i is
+         ends[i] - offsets[i];
+       - eols: the lines (as an array of indexes) for each kind of line
+         terminator (b'\n', b'\r\n', b'\r' and b'' for none);
+       - trailing: the lines which end with a space or a tab;
+       - blanks: the lines which contain only spaces and tabs (or are
+         empty);
+       - non_ascii: (line, offset) of the first non-ASCII character of
+         each line which has one;
+       - tabs: for each character of TABS, (line, offset) of its first
+         occurrence in each line which has one."""
+
+    def __init__(self, buf):
+        self.buffer = buf
+        # Offset of the start of each line, followed by the length of buf.
+        self.offsets = array('I', [0])
+        # Offset of the end of each line, without its terminator.
+        self.ends = array('I')
+        self.eols = dict([(eol, array('I'))
+                          for eol in (b'\n', b'\r\n', b'\r', b'')])
+        self.trailing = array('I')
+        self.blanks = array('I')
+        self.non_ascii = []
+        self.tabs = dict([(c, []) for c in TABS])
+        self._matches = {}
+        self._scan()
+
+    def _scan(self):
+        buf = self.buffer
+        offsets = self.offsets
+        line = 0
+        start = 0
+        # Line of the last character recorded, for each kind.
+        last = {}
+        for m in _facts_re.finditer(buf):
+            eol = m.group(2)
+            if eol is not None:
+                pos = m.start(2)
+                if pos == start and not eol:
+                    # End of the buffer, after a line terminator.
+                    break
+                blanks = m.group(1)
+                if blanks:
+                    self.trailing.append(line)
+                    tab = blanks.find(b'\t')
+                    if tab >= 0 and last.get(b'\t') != line:
+                        self.tabs[b'\t'].append((line, m.start() + tab))
+                if m.start() == start:
+                    self.blanks.append(line)
+                self.ends.append(pos)
+                self.eols[bytes(eol)].append(line)
+                start = m.end()
+                offsets.append(start)
+                line += 1
+                continue
+            c = m.group(3)
+            if c is None:
+                if last.get(None) != line:
+                    last[None] = line
+                    self.non_ascii.append((line, m.start()))
+            elif last.get(c) != line:
+                last[c] = line
+                self.tabs[c].append((line, m.start()))
+
+    def eol(self, i):
+        """Return the terminator of line i."""
+        return bytes(self.buffer[self.ends[i]:self.offsets[i + 1]])
+
+    def first_matches(self, regex):
+        """Return the list of (line index, match) for the first match of
+           regex (a compiled bytes pattern which does not match after the
+           terminator of a line) in each line, in order.  The buffer is
+           searched as a whole, so lines without a match are not handled in
+           Python.  The result is memorized for the rules which use the same
+           regex object."""
+        res = self._matches.get(regex)
+        if res is None:
+            res = []
+            buf = self.buffer
+            offsets = self.offsets
+            m = regex.search(buf)
+            while m is not None:
+                i = bisect.bisect_right(offsets, m.start()) - 1
+                res.append((i, m))
+                m = regex.search(buf, offsets[i + 1])
+            self._matches[regex] = res
+        return res
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        n = len(self.offsets) - 1
+        if i < 0:
+            i += n
+        if i < 0 or i >= n:
+            raise IndexError('line index out of range')
+        return bytes(self.buffer[self.offsets[i]:self.offsets[i + 1]])
+
+    def __iter__(self):
+        buf = self.buffer
+        offsets = self.offsets
+        for i in range(len(offsets) - 1):
+            yield bytes(buf[offsets[i]:offsets[i + 1]])
+
+
+def capture_stderr(func, *args):
+    """Call func with args.  Return its result and what was written on the
+       file descriptor of stderr (like the messages of libghdl)."""
+    sys.stderr.flush()
+    saved = os.dup(2)
+    with tempfile.TemporaryFile() as tmp:
+        os.dup2(tmp.fileno(), 2)
+        try:
+            res = func(*args)
+        finally:
+            os.dup2(saved, 2)
+            os.close(saved)
+        tmp.seek(0)
+        out = tmp.read()
+    return res, out.decode('utf-8', 'replace')
 
 
 def fatal(msg):
@@ -0,0 +1,255 @@
+"""Watch mode: check the files again each time they are modified.
+
+   After a change, the file, lexical and syntax rules are executed only on
+   the modified files, and the semantic and synthesis rules only on the
+   units that depend (directly or not) on a unit of a modified file.  The
+   diagnostics of the other files and units are kept in memory and
+   displayed again.
+
+   The files stay parsed and analyzed in libghdl between two executions.
+   Only the modified files, and the files with a unit that depends on a
+   unit of these files (as an analyzed unit cannot be analyzed again),
+   are purged from the work library, read, parsed and analyzed again."""
+
+import os
+import sys
+import time
+import libghdl.iirs as iirs
+import libghdl.thin as thin
+import vhdllint.nodeutils as nodeutils
+import vhdllint.utils as utils
+from vhdllint.rulesexec import RulesExec, STAGE_FILE, STAGE_LEX, \
+    STAGE_SYNTAX, STAGE_SEM, STAGE_SYNTH
+
+# Delay (in seconds) between two polls of the files.
+POLL_INTERVAL = 1.0
+
+
+class WatchExec(RulesExec):
+    def __init__(self, rules):
+        """Create an executor with the rules and the configuration of rules
+           (a RulesExec)."""
+        super(WatchExec, self).__init__(quiet=rules._quiet)
+        self.copy_rules(rules)
+        # Diagnostics of the previous executions, indexed by (stage, input
+        # index) or by (stage, input index, unit number).
+        self._results = {}
+        # Names of the files modified since the previous execution.
+        self._changed = set()
+        # Inputs (parsed, and their units in the work library) of the
+        # previous executions, indexed by file name.
+        self._inputs = {}
+        # Names of the files to be read again in this execution.
+        self._reload = set()
+        # Position of the units in their input.
+        self._positions = {}
+        # Units (of this execution) which depend on a modified unit.
+        self._affected = {}
+        # Units whose dependences are being computed by _is_affected, and
+        # whether a circular dependence was found.
+        self._visiting = set()
+        self._cycle = False
+        # When not None, the diagnostics are also appended to this list.
+        self._capture = None
+
+    def error(self, msg):
+        if self._capture is not None:
+            self._capture.append(msg)
+        super(WatchExec, self).error(msg)
+
+    def _run(self, key, changed, check, *args):
+        """Execute check(*args) if changed or if there are no results for
+           key, otherwise replay the results."""
+        res = None if changed else self._results.get(key)
+        if res is not None:
+            for msg in res:
+                self.error(msg)
+            return
+        self._capture = []
+        try:
+            check(*args)
+            self._results[key] = self._capture
+        finally:
+            self._capture = None
+
+    def _is_affected(self, unit):
+        """Return True iff unit is in a modified file or depends on such a
+           unit."""
+        res = self._affected.get(unit)
+        if res is not None:
+            return res
+        if unit in self._visiting:
+            # Circular dependence: the result is decided by the units of
+            # the cycle being computed.
+            self._cycle = True
+            return False
+        self._visiting.add(unit)
+        cycle = self._cycle
+        self._cycle = False
+        try:
+            fe, _ = utils.Location_To_File_Line(iirs.Get_Location(unit))
+            name = utils.file_entry_name(fe)
+            if not isinstance(name, str):
+                name = name.decode('utf-8')
+            res = name in self._changed
+            if not res:
+                res = any([self._is_affected(dep) for dep
+                           in nodeutils.get_dependence_units(unit)])
+        finally:
+            self._visiting.discard(unit)
+            found = self._cycle
+            self._cycle = cycle or found
+        # A negative result found through a unit being computed is only
+        # final once that unit is done.
+        if res or not found or not self._visiting:
+            self._affected[unit] = res
+        return res
+
+    def _add_units(self, inputs):
+        super(WatchExec, self)._add_units(inputs)
+        for input in inputs:
+            for i, unit in enumerate(input.units_ast):
+                self._positions[unit] = i
+
+    def _read_file(self, idx, filename, props):
+        if not self.needs_parse():
+            # The files are not kept.
+            return super(WatchExec, self)._read_file(idx, filename, props)
+        input = self._inputs.get(filename)
+        if input is not None and filename not in self._reload:
+            # Still parsed and analyzed.
+            input.index = idx
+            input.props = props
+            return input
+        input = super(WatchExec, self)._read_file(idx, filename, props)
+        self._inputs[filename] = input
+        return input
+
+    def _purge(self, input):
+        """Remove the units of input from the work library and discard its
+           file."""
+        files = set()
+        for unit in input.units_ast:
+            self._positions.pop(unit, None)
+            files.add(iirs.Get_Design_File(unit))
+        for f in files:
+            thin.Purge_Design_File(f)
+        if input.fe in self._source_files:
+            self._source_files.remove(input.fe)
+        utils.discard_file_buffer(input.fe)
+
+    def _prepare(self, args):
+        """Purge from libghdl the files of the previous execution which
+           have been modified or are not used anymore, and those with a
+           unit that depends on a unit of such files.  Set the files to be
+           read again."""
+        names = set([f for _, f, _ in args])
+        stale = set([f for f in self._inputs
+                     if f in self._changed or f not in names])
+        stale_units = set()
+        for f in stale:
+            stale_units.update(self._inputs[f].units_ast)
+        # The dependences of the units of the other files.
+        deps = {}
+        for f, input in self._inputs.items():
+            if f not in stale:
+                deps[f] = [d for u in input.units_ast
+                           if iirs.Get_Library_Unit(u) != thin.Null_Iir
+                           and iirs.Get_Date_State(u) == \
+                           iirs.Date_State.Analyze
+                           for d in nodeutils.get_dependence_units(u)]
+        changed = True
+        while changed:
+            changed = False
+            for f, units in deps.items():
+                if f not in stale and any([d in stale_units for d in units]):
+                    stale.add(f)
+                    stale_units.update(self._inputs[f].units_ast)
+                    changed = True
+        for f in stale:
+            self._purge(self._inputs.pop(f))
+        if stale:
+            # Nodes have been freed.
+            nodeutils.clear_identifier_cache()
+        self._reload = set([f for f in names if f not in self._inputs])
+
+    def _full_reset(self):
+        """Forget everything (after a fatal error)."""
+        self.reset()
+        self._inputs = {}
+        self._positions = {}
+        self._results = {}
+
+    def _check_file(self, input):
+        self._run((STAGE_FILE, input.index), input.filename in self._changed,
+                  super(WatchExec, self)._check_file, input)
+
+    def _check_lex(self, input, tok_rules):
+        self._run((STAGE_LEX, input.index), input.filename in self._changed,
+                  super(WatchExec, self)._check_lex, input, tok_rules)
+
+    def _check_syntax(self, input):
+        self._run((STAGE_SYNTAX, input.index),
+                  input.filename in self._changed,
+                  super(WatchExec, self)._check_syntax, input)
+
+    def _check_sem(self, input, unit):
+        self._run((STAGE_SEM, input.index, self._positions[unit]),
+                  self._is_affected(unit),
+                  super(WatchExec, self)._check_sem, input, unit)
+
+    def _check_synth(self, input, unit):
+        self._run((STAGE_SYNTH, input.index, self._positions[unit]),
+                  self._is_affected(unit),
+                  super(WatchExec, self)._check_synth, input, unit)
+
+    @staticmethod
+    def _stamp(filename):
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        return (st.st_mtime, st.st_size)
+
+    def watch(self, files):
+        """Check files, and check them again when they are modified (until
+           interrupted)."""
+        stamps = dict([(f, self._stamp(f)) for f in files
+                       if not f.startswith('--')])
+        self._changed = set(stamps.keys())
+        while True:
+            self._nbr_errors = 0
+            self._nbr_files = 0
+            self._filenames = {}
+            self._affected = {}
+            try:
+                # Parsed each time, as the --import files needed may change.
+                args = self.parse_args(files)
+                if self.needs_parse():
+                    self._prepare(args)
+                self.execute_args(args)
+                # The work library now contains checked units.
+                self._save_imports = False
+                nbr_files = self.get_nbr_files()
+                print('{0} file{1} checked'.format(
+                    nbr_files, '' if nbr_files < 2 else 's'))
+                nbr_errors = self.get_nbr_errors()
+                if nbr_errors == 0:
+                    print('No error')
+                else:
+                    print('{0} error(s)'.format(nbr_errors))
+            except SystemExit:
+                # Fatal error (like a missing file), wait for a change.
+                self._full_reset()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            # Wait for modifications.
+            self._changed = set()
+            while not self._changed:
+                time.sleep(POLL_INTERVAL)
+                for f, stamp in stamps.items():
+                    new_stamp = self._stamp(f)
+                    if new_stamp != stamp:
+                        stamps[f] = new_stamp
+                        self._changed.add(f)
+            print('\nchanged: {0}'.format(', '.join(sorted(self._changed))))